@@ -12,6 +12,26 @@ class Settings(BaseSettings):
 
     ADMIN_USERNAME: str = "admin"
     ADMIN_PASSWORD: str = "bizup1234"
+
+    SALES_QUEUE_MAXSIZE: int = 1000
+    SALES_QUEUE_MERGE_MAX: int = 50
+    SALES_BATCH_STATUS_RETENTION: int = 1000
+
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+
+    # 재고 통계를 프로세스 메모리 카운터로 응답 (단일 워커 배포에서만 권장)
+    INVENTORY_STATS_COUNTERS: bool = False
+
+    # 재고 실시간 이벤트(SSE) 구독자별 버퍼 크기와 keepalive 주기
+    INVENTORY_EVENTS_BUFFER: int = 100
+    INVENTORY_EVENTS_KEEPALIVE_SECONDS: float = 15.0
+
+    # 메뉴별 가능 인분 계산용 재고 벡터를 DB 에서 다시 읽는 주기 (다른 워커의 변경 반영)
+    AVAILABILITY_RESYNC_SECONDS: float = 60.0
+
+    # 메뉴 CSV 가져오기에서 한 번에 조회/INSERT 하는 메뉴 수
+    MENU_IMPORT_CHUNK_SIZE: int = 500
     
     class Config:
         env_file = ".env"
@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.schema import CreateTable
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -32,5 +33,75 @@ def get_db():
         db.close()
 
 
+# AUTOINCREMENT 테이블 -> 그 id 를 참조하는 이력 (테이블, 컬럼). 예전 id 를 다시 발급하지 않기 위해 확인한다
+_ID_HISTORY = {
+    "menus": [("sales_events", "menu_id"), ("sales_rollup_menu", "menu_id")],
+    "inventory_items": [
+        ("sales_rollup_ingredient", "inventory_item_id"),
+        ("inventory_tombstones", "item_id"),
+        ("inventory_movements", "inventory_item_id"),
+        ("order_items", "inventory_item_id")
+    ]
+}
+
+
+def _ensure_autoincrement(table):
+    """AUTOINCREMENT 없이 만들어진 기존 SQLite 테이블을 다시 만들어 id 가 재사용되지 않게 한다.
+
+    SQLite 는 ALTER 로 AUTOINCREMENT 를 붙일 수 없으므로 이름을 바꾼 기존 테이블에서 행을 옮기고
+    트리거(검색 색인 동기화)를 다시 만든다. 이력에 남은 가장 큰 id 다음부터 발급하도록
+    sqlite_sequence 도 맞춘다. 전체를 한 트랜잭션으로 실행한다.
+    """
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        row = cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+        ).fetchone()
+        if row is None or "AUTOINCREMENT" in row[0].upper():
+            return
+        old = f"{table.name}__old"
+        old_columns = {info[1] for info in cursor.execute(f'PRAGMA table_info("{table.name}")')}
+        columns = ", ".join(f'"{column.name}"' for column in table.columns if column.name in old_columns)
+        triggers = cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table.name,)
+        ).fetchall()
+        existing = {name for (name,) in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        history = [
+            f'SELECT MAX("{column}") FROM "{source}"'
+            for source, column in _ID_HISTORY.get(table.name, [])
+            if source in existing
+        ]
+        statements = [f'DROP TRIGGER "{name}"' for name, _ in triggers] + [
+            "PRAGMA legacy_alter_table = ON",
+            f'ALTER TABLE "{table.name}" RENAME TO "{old}"',
+            "PRAGMA legacy_alter_table = OFF",
+            str(CreateTable(table).compile(dialect=engine.dialect)).strip(),
+            f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM "{old}"',
+            f'DROP TABLE "{old}"'
+        ] + [sql for _, sql in triggers] + [
+            f"DELETE FROM sqlite_sequence WHERE name = '{table.name}'",
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT '{table.name}', COALESCE(MAX(seq), 0) FROM ("
+            + " UNION ALL ".join([f'SELECT MAX(id) AS seq FROM "{table.name}"'] + history)
+            + ")"
+        ]
+        cursor.executescript("BEGIN;\n" + ";\n".join(statements) + ";\nCOMMIT;")
+        print(f"{table.name} 테이블을 AUTOINCREMENT 로 변환했습니다.")
+    except Exception:
+        if raw.driver_connection.in_transaction:
+            raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+
 def init_db():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    if engine.dialect.name == "sqlite":
+        for table in Base.metadata.sorted_tables:
+            if table.dialect_options["sqlite"]["autoincrement"]:
+                _ensure_autoincrement(table)
+    # create_all 은 이미 있는 테이블에 새로 추가된 인덱스를 만들지 않으므로 따로 확인
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
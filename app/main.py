@@ -1,9 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.database import init_db
+from app.database import init_db, engine
 from app.models import (
     InventoryItem,
+    InventoryTombstone,
+    InventoryMovement,
     Order,
     OrderItem,
     Employee,
@@ -13,6 +15,11 @@ from app.models import (
     MenuIngredient,
     User,
     Contract,
+    SalesEvent,
+    IdempotencyKey,
+    MenuSalesRollup,
+    IngredientUsageRollup,
+    DataVersion,
 )
 from app.routers import inventory, orders, outofstock, employees, store, sales, menus, auth, contracts
 
@@ -33,6 +40,15 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    from app.services import search_service
+    search_service.ensure_search_index(engine)
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    from app.services import sales_queue, inventory_events
+    sales_queue.shutdown()
+    inventory_events.shutdown()
 
 app.include_router(inventory.router, prefix=settings.API_V1_PREFIX)
 app.include_router(orders.router, prefix=settings.API_V1_PREFIX)
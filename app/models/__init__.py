@@ -1,13 +1,17 @@
-from app.models.inventory import InventoryItem
+from app.models.inventory import InventoryItem, InventoryTombstone, InventoryMovement
 from app.models.order import Order, OrderItem
 from app.models.employee import Employee
 from app.models.store import Store, NotificationSettings
 from app.models.menu import Menu, MenuIngredient
 from app.models.user import User
 from app.models.contract import Contract
+from app.models.sales import SalesEvent, IdempotencyKey, MenuSalesRollup, IngredientUsageRollup
+from app.models.data_version import DataVersion
 
 __all__ = [
     "InventoryItem",
+    "InventoryTombstone",
+    "InventoryMovement",
     "Order",
     "OrderItem",
     "Employee",
@@ -17,5 +21,10 @@ __all__ = [
     "MenuIngredient",
     "User",
     "Contract",
+    "SalesEvent",
+    "IdempotencyKey",
+    "MenuSalesRollup",
+    "IngredientUsageRollup",
+    "DataVersion",
 ]
 
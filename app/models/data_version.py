@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from app.database import Base
+
+
+class DataVersion(Base):
+    """영역(재고/메뉴/발주/매출)별 데이터 버전. 쓰기와 같은 트랜잭션에서 올려 모든 워커가 공유한다."""
+    __tablename__ = "data_versions"
+    
+    domain = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -1,10 +1,12 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey
 from sqlalchemy.sql import func
 from app.database import Base
 
 
 class InventoryItem(Base):
     __tablename__ = "inventory_items"
+    # CSV 초기화로 모두 지워도 id 를 재사용하지 않도록 (사용량 롤업/발주 이력이 재고 id 로 남는다)
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
@@ -15,5 +17,26 @@ class InventoryItem(Base):
     price = Column(Float, nullable=False, default=0)
     last_updated = Column(Date, nullable=False, server_default=func.date('now'))
     created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
 
+
+
+class InventoryTombstone(Base):
+    __tablename__ = "inventory_tombstones"
+
+    # 삭제된 재고 id 기록 (변경분 동기화에서 삭제를 전달하기 위함)
+    item_id = Column(Integer, primary_key=True)
+    deleted_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
+
+
+class InventoryMovement(Base):
+    __tablename__ = "inventory_movements"
+
+    # 재고 입출고 기록 (발주 입고 등 수량을 더하거나 뺀 내역)
+    id = Column(Integer, primary_key=True, index=True)
+    inventory_item_id = Column(Integer, nullable=False, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True, index=True)
+    change = Column(Float, nullable=False)
+    quantity_after = Column(Float, nullable=False)
+    reason = Column(String, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), index=True)
@@ -5,6 +5,8 @@ from app.database import Base
 
 class Menu(Base):
     __tablename__ = "menus"
+    # CSV 초기화로 모두 지워도 id 를 재사용하지 않도록 (매출 이력/롤업이 menu_id 로 남는다)
+    __table_args__ = {"sqlite_autoincrement": True}
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, unique=True, index=True)
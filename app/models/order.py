@@ -22,19 +22,19 @@ class Order(Base):
     __tablename__ = "orders"
 
     id = Column(Integer, primary_key=True, index=True)
-    status = Column(SQLEnum(OrderStatus), default=OrderStatus.PENDING)
+    status = Column(SQLEnum(OrderStatus), default=OrderStatus.PENDING, index=True)
     total_cost = Column(Float, nullable=False, default=0)
-    created_at = Column(DateTime, server_default=func.now())
+    created_at = Column(DateTime, server_default=func.now(), index=True)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
-    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan", order_by="OrderItem.id")
 
 
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     inventory_item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=False)
     quantity = Column(Float, nullable=False)
     unit_price = Column(Float, nullable=False)
@@ -43,6 +43,7 @@ class OrderItem(Base):
     created_at = Column(DateTime, server_default=func.now())
 
     order = relationship("Order", back_populates="items")
+    inventory_item = relationship("InventoryItem")
 
 
 class OrderRecommendation(Base):
@@ -0,0 +1,51 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class SalesEvent(Base):
+    __tablename__ = "sales_events"
+    __table_args__ = (
+        Index("ix_sales_events_sold_at", "sold_at"),
+        Index("ix_sales_events_menu_id_sold_at", "menu_id", "sold_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # 메뉴가 CSV 초기화로 삭제되어도 이력이 남도록 외래키 대신 id/이름을 함께 보관
+    menu_id = Column(Integer, nullable=False)
+    menu_name = Column(String, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    sold_at = Column(DateTime, nullable=False)
+    # [[inventory_item_id, 차감량], ...]
+    deductions = Column(JSON, nullable=False, default=list)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # "batch:<키>" 또는 "sale:<키>"
+    key = Column(String, primary_key=True)
+    response = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, index=True)
+
+
+class MenuSalesRollup(Base):
+    __tablename__ = "sales_rollup_menu"
+
+    # granularity: "hour" | "day"
+    granularity = Column(String, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    menu_id = Column(Integer, primary_key=True)
+    menu_name = Column(String, nullable=False)
+    quantity = Column(Integer, nullable=False, default=0)
+    sales_count = Column(Integer, nullable=False, default=0)
+
+
+class IngredientUsageRollup(Base):
+    __tablename__ = "sales_rollup_ingredient"
+
+    granularity = Column(String, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    inventory_item_id = Column(Integer, primary_key=True)
+    amount = Column(Float, nullable=False, default=0)
@@ -1,77 +1,174 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.database import get_db
+from datetime import datetime
+from app.database import get_db, SessionLocal
+from app.config import settings
+from app.models.store import NotificationSettings
 from app.schemas.inventory import (
     InventoryItemCreate,
     InventoryItemUpdate,
     InventoryItemResponse,
-    InventoryItemWithStatus
+    InventoryItemWithStatus,
+    InventoryPageResponse,
+    InventoryChangesResponse,
+    StockProjectionRequest,
+    StockProjectionResponse,
+    inventory_rows_adapter
 )
-from app.services import inventory_service
+from app.services import inventory_service, search_service, data_version, inventory_events, projection_service
 
 router = APIRouter(prefix="/inventory", tags=["재고 관리"])
 
 
+def _with_status(item) -> InventoryItemWithStatus:
+    return InventoryItemWithStatus(
+        id=item.id,
+        name=item.name,
+        category=item.category,
+        quantity=item.quantity,
+        unit=item.unit,
+        min_quantity=item.min_quantity,
+        price=item.price,
+        last_updated=item.last_updated,
+        created_at=item.created_at,
+        updated_at=item.updated_at,
+        status=inventory_service.get_stock_status(item.quantity, item.min_quantity)
+    )
+
+
 @router.get("/", response_model=List[InventoryItemWithStatus])
 def get_inventory_items(
     skip: int = Query(0, ge=0),
     limit: int = Query(1000, ge=1, le=10000),
     search: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    etag = data_version.etag(db, data_version.INVENTORY)
+    if data_version.is_fresh(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    rows = inventory_service.get_inventory_rows(db, skip=skip, limit=limit, search=search)
+    return Response(
+        content=inventory_rows_adapter.dump_json(rows),
+        media_type="application/json",
+        headers={"ETag": etag}
+    )
+
+
+@router.get("/page", response_model=InventoryPageResponse)
+def get_inventory_page(
+    cursor: Optional[int] = Query(None, ge=0, description="이전 응답의 next_cursor"),
+    limit: int = Query(500, ge=1, le=5000),
+    search: Optional[str] = Query(None),
     db: Session = Depends(get_db)
 ):
-    items = inventory_service.get_inventory_items(db, skip=skip, limit=limit, search=search)
+    items, next_cursor = inventory_service.get_inventory_page(db, cursor=cursor, limit=limit, search=search)
+    return {"items": [_with_status(item) for item in items], "next_cursor": next_cursor}
+
+
+@router.get("/changes", response_model=InventoryChangesResponse)
+def get_inventory_changes(
+    changed_since: datetime = Query(..., description="이전 응답의 watermark"),
+    db: Session = Depends(get_db)
+):
+    changes = inventory_service.get_inventory_changes(db, changed_since)
+    return {
+        "items": [_with_status(item) for item in changes["items"]],
+        "deleted_ids": changes["deleted_ids"],
+        "watermark": changes["watermark"]
+    }
+
+
+@router.get("/search", response_model=List[InventoryItemWithStatus])
+def search_inventory(
+    q: str = Query(..., min_length=1, description="검색어 (상품명 또는 카테고리)"),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    items = search_service.search_inventory(db, q, limit=limit)
+    return [_with_status(item) for item in items]
+
+
+@router.get("/autocomplete")
+def autocomplete_inventory(
+    prefix: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    return [
+        {"id": item_id, "name": name}
+        for item_id, name in search_service.autocomplete_inventory(db, prefix, limit=limit)
+    ]
+
+
+def _load_notification_flags():
+    db = SessionLocal()
+    try:
+        notification = db.query(NotificationSettings).first()
+        if notification:
+            inventory_events.configure(notification.low_stock, notification.out_of_stock)
+    finally:
+        db.close()
+
+
+def _sse(event) -> str:
+    if event is None:
+        return ": keepalive\n\n"
+    if isinstance(event, str):
+        return f"event: {event}\ndata: {{}}\n\n"
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+@router.get("/events")
+async def stream_inventory_events(alerts_only: bool = Query(False, description="true 이면 부족/품절 알림만 전송")):
+    """재고 수량 변경과 상태 전환(부족/품절 알림)을 Server-Sent Events 로 전송한다."""
+    await run_in_threadpool(_load_notification_flags)
+    subscriber = inventory_events.subscribe()
     
-    result = []
-    for item in items:
-        status = inventory_service.get_stock_status(item.quantity, item.min_quantity)
-        item_dict = {
-            "id": item.id,
-            "name": item.name,
-            "category": item.category,
-            "quantity": item.quantity,
-            "unit": item.unit,
-            "min_quantity": item.min_quantity,
-            "price": item.price,
-            "last_updated": item.last_updated,
-            "created_at": item.created_at,
-            "updated_at": item.updated_at,
-            "status": status
-        }
-        result.append(InventoryItemWithStatus(**item_dict))
+    async def event_stream():
+        yield ": connected\n\n"
+        async for event in inventory_events.listen(subscriber, settings.INVENTORY_EVENTS_KEEPALIVE_SECONDS):
+            if alerts_only and isinstance(event, dict) and event["type"] != "alert":
+                continue
+            yield _sse(event)
     
-    return result
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/projection", response_model=StockProjectionResponse)
+def project_stock(request: StockProjectionRequest, db: Session = Depends(get_db)):
+    """예정 매출을 반영했을 때의 재고 소진 시점과 부족량 (실제 재고는 바꾸지 않음)"""
+    return projection_service.project_stock(db, request.sales)
 
 
 @router.get("/stats")
-def get_inventory_stats(db: Session = Depends(get_db)):
+def get_inventory_stats(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     from app.services import analytics_service
     
+    etag = data_version.etag(db, data_version.INVENTORY)
+    if data_version.is_fresh(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
     stats = analytics_service.get_inventory_stats(db)
+    response.headers["ETag"] = etag
     return stats
 
 
 @router.get("/low-stock", response_model=List[InventoryItemWithStatus])
 def get_low_stock_items(db: Session = Depends(get_db)):
-    items = inventory_service.get_low_stock_items(db)
-    result = []
-    for item in items:
-        status = inventory_service.get_stock_status(item.quantity, item.min_quantity)
-        item_dict = {
-            "id": item.id,
-            "name": item.name,
-            "category": item.category,
-            "quantity": item.quantity,
-            "unit": item.unit,
-            "min_quantity": item.min_quantity,
-            "price": item.price,
-            "last_updated": item.last_updated,
-            "created_at": item.created_at,
-            "updated_at": item.updated_at,
-            "status": status
-        }
-        result.append(InventoryItemWithStatus(**item_dict))
-    return result
+    rows = inventory_service.get_low_stock_rows(db)
+    return Response(content=inventory_rows_adapter.dump_json(rows), media_type="application/json")
 
 
 @router.get("/{item_id}", response_model=InventoryItemResponse)
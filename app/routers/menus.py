@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Response, Header
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
-from app.schemas.menu import MenuResponse
-from app.services import menu_service
+from app.schemas.menu import (
+    MenuResponse,
+    MenuAvailabilityResponse,
+    MenuCostResponse,
+    MenuCostDetailResponse,
+    menu_rows_adapter
+)
+from app.services import menu_service, recipe_cache, search_service, data_version, availability_service, menu_cost_service
 
 router = APIRouter(prefix="/menus", tags=["메뉴 관리"])
 
 
 @router.post("/upload-csv")
-async def upload_menu_csv(
+def upload_menu_csv(
     file: UploadFile = File(...),
     mode: str = Query("add", pattern="^(add|reset)$"),
     db: Session = Depends(get_db)
@@ -18,20 +24,19 @@ async def upload_menu_csv(
     print(f"CSV 업로드 요청 수신: {file.filename}")
     print(f"{'='*60}\n")
     
+    errors = []
     try:
-        content = await file.read()
-        csv_content = content.decode('utf-8')
-        
-        menus, inventory_items, stats = menu_service.create_menu_from_csv(db, csv_content, mode)
-        
-        ingredient_names = [item.name for item in inventory_items] if inventory_items else []
+        # 업로드 파일을 한 번에 읽지 않고 파싱하면서 묶음 단위로 가져온다
+        menus, ingredient_names, stats = menu_service.import_menus(
+            db, menu_service.iter_menu_csv(file.file, errors), mode
+        )
         
         from app.models.inventory import InventoryItem
         total_inventory_count = db.query(InventoryItem).count()
         
         
         action_label = "추가" if mode == "add" else "초기화"
-        message = f"[{action_label}] {len(menus)}개 메뉴 데이터를 처리했습니다."
+        message = f"[{action_label}] {stats['menus_count']}개 메뉴 데이터를 처리했습니다."
         if mode == "add":
             message += f" (신규 {stats['menus_created']}개, 업데이트 {stats['menus_updated']}개)"
         else:
@@ -39,22 +44,25 @@ async def upload_menu_csv(
         
         print(f"\n{'='*60}")
         print(f"CSV 업로드 완료")
-        print(f"   - 메뉴: {len(menus)}개")
-        print(f"   - 재료: {len(inventory_items)}개")
+        print(f"   - 메뉴: {stats['menus_count']}개")
+        print(f"   - 신규 재료: {stats['inventory_registered']}개")
         print(f"   - 전체 재고 항목: {total_inventory_count}개")
         print(f"{'='*60}\n")
         
+        # 메뉴/재료 목록은 파일 크기와 관계없이 앞쪽 일부만 예시로 담는다
         return {
             "success": True,
             "mode": mode,
             "message": message,
-            "menus_count": len(menus),
+            "menus_count": stats["menus_count"],
             "menus_created": stats["menus_created"],
             "menus_updated": stats["menus_updated"],
             "ingredients_registered": stats["inventory_registered"],
             "ingredient_names": ingredient_names,
             "total_inventory_count": total_inventory_count,
-            "menus": menus
+            "errors": errors,
+            "menus": menus,
+            "menus_truncated": stats["menus_truncated"]
         }
     except Exception as e:
         print(f"\nCSV 업로드 오류: {e}")
@@ -63,26 +71,79 @@ async def upload_menu_csv(
         return {
             "success": False,
             "mode": mode,
-            "message": str(e)
+            "message": str(e),
+            "errors": errors
         }
 
 
 @router.get("/", response_model=List[MenuResponse])
-def get_menus(db: Session = Depends(get_db)):
-    menus = menu_service.get_all_menus(db)
-    result = []
-    for menu in menus:
-        result.append(MenuResponse(
-            id=menu.id,
-            name=menu.name,
-            ingredients=[
-                {
-                    "ingredient_name": ing.ingredient_name,
-                    "quantity": ing.quantity,
-                    "unit": ing.unit
-                }
-                for ing in menu.ingredients
-            ]
-        ))
-    return result
+def get_menus(
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    etag = data_version.etag(db, data_version.MENU)
+    if data_version.is_fresh(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    rows = menu_service.get_menu_rows(db)
+    return Response(
+        content=menu_rows_adapter.dump_json(rows),
+        media_type="application/json",
+        headers={"ETag": etag}
+    )
+
+
+@router.get("/availability", response_model=List[MenuAvailabilityResponse])
+def get_menu_availability(
+    menu_id: Optional[int] = Query(None),
+    max_servings: Optional[int] = Query(None, ge=0, description="가능 인분이 이 값 이하인 메뉴만"),
+    db: Session = Depends(get_db)
+):
+    availability = availability_service.get_availability(db, menu_id=menu_id)
+    if max_servings is not None:
+        availability = [
+            menu for menu in availability
+            if menu["servings"] is not None and menu["servings"] <= max_servings
+        ]
+    return availability
+
+
+@router.get("/costs", response_model=List[MenuCostResponse])
+def get_menu_costs(db: Session = Depends(get_db)):
+    return Response(content=menu_cost_service.get_menu_costs_json(db), media_type="application/json")
+
 
+@router.get("/{menu_id}/cost", response_model=MenuCostDetailResponse)
+def get_menu_cost(menu_id: int, db: Session = Depends(get_db)):
+    cost = menu_cost_service.get_menu_cost(db, menu_id)
+    if not cost:
+        raise HTTPException(status_code=404, detail="메뉴를 찾을 수 없습니다")
+    return cost
+
+
+@router.get("/recipe-cache")
+def get_recipe_cache_stats():
+    return recipe_cache.get_stats()
+
+
+@router.get("/search")
+def search_menus(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    return [
+        {"id": menu_id, "name": name}
+        for menu_id, name in search_service.search_menus(db, q, limit=limit)
+    ]
+
+
+@router.get("/autocomplete")
+def autocomplete_menus(
+    prefix: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    return [
+        {"id": menu_id, "name": name}
+        for menu_id, name in search_service.autocomplete_menus(db, prefix, limit=limit)
+    ]
@@ -1,16 +1,39 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
-from app.schemas.order import OrderRecommendationResponse, OrderCreate, OrderResponse
+from datetime import datetime
+from app.schemas.order import (
+    OrderRecommendationResponse,
+    OrderCreate,
+    OrderResponse,
+    OrderListResponse,
+    OrderStatusUpdate,
+    OrderOptimizeRequest,
+    OrderOptimizeResponse,
+    OrderPriority,
+    OrderStatus
+)
 from app.services import order_service
 
 router = APIRouter(prefix="/orders", tags=["발주 관리"])
 
 
 @router.get("/recommendations", response_model=List[OrderRecommendationResponse])
-def get_order_recommendations(db: Session = Depends(get_db)):
-    recommendations = order_service.get_order_recommendations(db)
+def get_order_recommendations(
+    window_days: int = Query(14, ge=1, le=365, description="평균 사용량을 계산할 최근 일수"),
+    half_life_days: Optional[float] = Query(None, gt=0, description="지정하면 최근 사용량에 가중치 (반감기, 일)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    priority: Optional[OrderPriority] = Query(None),
+    db: Session = Depends(get_db)
+):
+    recommendations = order_service.get_order_recommendations(
+        db,
+        window_days=window_days,
+        half_life_days=half_life_days,
+        limit=limit,
+        priority=priority
+    )
     
     result = []
     for rec in recommendations:
@@ -30,7 +53,65 @@ def get_order_recommendations(db: Session = Depends(get_db)):
     return result
 
 
+@router.post("/optimize", response_model=OrderOptimizeResponse)
+def optimize_order(request: OrderOptimizeRequest, db: Session = Depends(get_db)):
+    """예산 안에서 확보 일수를 최대화하는 발주안 (발주를 만들지는 않음)"""
+    result, missing_ids = order_service.optimize_order(
+        db,
+        budget=request.budget,
+        pack_sizes=request.pack_sizes,
+        horizon_days=request.horizon_days,
+        window_days=request.window_days,
+        half_life_days=request.half_life_days
+    )
+    if missing_ids:
+        raise HTTPException(
+            status_code=404,
+            detail=f"재고 아이템을 찾을 수 없습니다: {', '.join(str(item_id) for item_id in missing_ids)}"
+        )
+    return result
+
+
 @router.post("/", response_model=OrderResponse, status_code=201)
 def create_order(order: OrderCreate, db: Session = Depends(get_db)):
-    return order_service.create_order(db, order)
+    created, missing_ids = order_service.create_order(db, order)
+    if missing_ids:
+        raise HTTPException(
+            status_code=404,
+            detail=f"재고 아이템을 찾을 수 없습니다: {', '.join(str(item_id) for item_id in missing_ids)}"
+        )
+    return created
+
+
+@router.get("/", response_model=OrderListResponse)
+def list_orders(
+    status: Optional[OrderStatus] = Query(None),
+    start: Optional[datetime] = Query(None, description="이 시각 이후 생성된 발주"),
+    end: Optional[datetime] = Query(None, description="이 시각 이전 생성된 발주"),
+    cursor: Optional[int] = Query(None, ge=1, description="이전 응답의 next_cursor"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    orders, next_cursor = order_service.list_orders(
+        db, status=status, start=start, end=end, cursor=cursor, limit=limit
+    )
+    return {"items": orders, "next_cursor": next_cursor}
+
+
+@router.get("/{order_id}", response_model=OrderResponse)
+def get_order(order_id: int, db: Session = Depends(get_db)):
+    order = order_service.get_order(db, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="발주를 찾을 수 없습니다")
+    return order
+
+
+@router.patch("/{order_id}/status", response_model=OrderResponse)
+def update_order_status(order_id: int, update: OrderStatusUpdate, db: Session = Depends(get_db)):
+    order, error = order_service.update_order_status(db, order_id, update.status)
+    if error:
+        raise HTTPException(status_code=409, detail=error)
+    if not order:
+        raise HTTPException(status_code=404, detail="발주를 찾을 수 없습니다")
+    return order
 
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, Header
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date
 from app.database import get_db
 from app.schemas.store import OutOfStockItemResponse, OutOfStockMenuResponse
-from app.services import analytics_service, inventory_service
+from app.services import analytics_service, inventory_service, data_version
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/out-of-stock", tags=["품절 관리"])
@@ -15,7 +16,16 @@ class OutOfStockResponse(BaseModel):
 
 
 @router.get("/", response_model=OutOfStockResponse)
-def get_out_of_stock_items(db: Session = Depends(get_db)):
+def get_out_of_stock_items(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    # 품절 메뉴는 재고와 메뉴 구성 모두에, 품절 일수/예상 손실은 오늘 날짜에 의존
+    etag = data_version.etag(db, data_version.INVENTORY, data_version.MENU, extra=date.today().isoformat())
+    if data_version.is_fresh(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     items = analytics_service.get_out_of_stock_items(db)
     menus = analytics_service.get_out_of_stock_menus(db)
     return {
@@ -1,109 +1,201 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
-from pydantic import BaseModel
-from datetime import date
-from app.database import get_db
-from app.services import menu_service, inventory_service
-from app.models.inventory import InventoryItem
+from typing import List, Optional, Tuple
+from datetime import datetime
+from pydantic import BaseModel, ValidationError, field_validator
+from app.database import get_db, SessionLocal
+from app.schemas.sales import MenuSalesRollupResponse, IngredientUsageRollupResponse
+from app.services import inventory_service, sales_service, sales_queue, idempotency_service, rollup_service
 
 router = APIRouter(prefix="/sales", tags=["매출 관리"])
 
 _simulator_paused = False
 
+BACKFILL_MAX_REPORTED_ERRORS = 100
+
 
 class SaleItem(BaseModel):
     menu_name: str
     quantity: int
     timestamp: str
+    idempotency_key: Optional[str] = None
+
+
+class BackfillSaleItem(SaleItem):
+    @field_validator("timestamp")
+    @classmethod
+    def check_timestamp(cls, value: str) -> str:
+        # 실시간 수신과 달리 과거 기록은 시각이 곧 데이터이므로 현재 시각으로 대신하지 않는다
+        try:
+            datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"timestamp 형식이 올바르지 않습니다 (ISO 8601 필요): {value!r}")
+        return value
 
 
 class SalesReceiveRequest(BaseModel):
     sales: List[SaleItem]
+    idempotency_key: Optional[str] = None
 
 
 @router.post("/receive")
-def receive_sales(sales_data: SalesReceiveRequest, db: Session = Depends(get_db)):
+def receive_sales(
+    sales_data: SalesReceiveRequest,
+    mode: str = Query("sync", pattern="^(sync|async)$"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
+    key = idempotency_key or sales_data.idempotency_key
+    if key:
+        stored = idempotency_service.lookup(db, idempotency_service.batch_key(key))
+        if stored is not None:
+            return stored
+    
     if inventory_service.has_uninitialized_inventory(db):
         raise HTTPException(status_code=400, detail="재고 초기화가 완료되지 않아 실시간 차감을 수행할 수 없습니다.")
-    results = []
     
-    for sale in sales_data.sales:
-        try:
-            ingredients = menu_service.get_menu_ingredients(db, sale.menu_name)
-            
-            if not ingredients:
-                results.append({
-                    "menu_name": sale.menu_name,
-                    "status": "error",
-                    "message": f"메뉴 '{sale.menu_name}'를 찾을 수 없습니다"
-                })
-                continue
-            
-            deducted_items = []
-            for ing in ingredients:
-                ingredient_name = ing["ingredient_name"].strip()
-                
-                inventory_item = db.query(InventoryItem).filter(
-                    InventoryItem.name == ingredient_name
-                ).first()
-                
-                if inventory_item:
-                    old_quantity = inventory_item.quantity
-                    total_deduct = ing["quantity"] * sale.quantity
-                    new_quantity = max(0, inventory_item.quantity - total_deduct)
-                    
-                    inventory_item.quantity = new_quantity
-                    inventory_item.last_updated = date.today()
-                    
-                    status = inventory_service.get_stock_status(new_quantity, inventory_item.min_quantity)
-                    old_status = inventory_service.get_stock_status(old_quantity, inventory_item.min_quantity)
-                    
-                    status_changed = status != old_status
-                    warning = None
-                    if status_changed:
-                        if status == "품절":
-                            warning = f"{inventory_item.name} 재고가 품절되었습니다!"
-                        elif status == "부족":
-                            warning = f"{inventory_item.name} 재고가 부족합니다! (현재: {new_quantity}{inventory_item.unit}, 최소: {inventory_item.min_quantity}{inventory_item.unit})"
-                    
-                    deducted_items.append({
-                        "ingredient": ing["ingredient_name"],
-                        "deducted": total_deduct,
-                        "remaining": new_quantity,
-                        "old_quantity": old_quantity,
-                        "status": status,
-                        "status_changed": status_changed,
-                        "warning": warning
-                    })
-                else:
-                    deducted_items.append({
-                        "ingredient": ingredient_name,
-                        "deducted": 0,
-                        "remaining": 0,
-                        "message": f"재고에 '{ingredient_name}'이(가) 등록되지 않았습니다. CSV 파일을 다시 업로드하세요."
-                    })
-                    print(f"경고: 재고에 '{ingredient_name}'이(가) 없습니다. 메뉴: {sale.menu_name}")
-            
-            db.commit()
-            
-            results.append({
-                "menu_name": sale.menu_name,
-                "quantity": sale.quantity,
-                "status": "success",
-                "deducted_items": deducted_items
-            })
-            
-        except Exception as e:
-            results.append({
-                "menu_name": sale.menu_name,
-                "status": "error",
-                "message": str(e)
-            })
+    if mode == "async":
+        accepted = sales_queue.enqueue(sales_data.sales, key)
+        if accepted is None:
+            raise HTTPException(status_code=503, detail="매출 처리 대기열이 가득 찼습니다. 잠시 후 다시 시도하세요.")
+        return JSONResponse(status_code=202, content=accepted)
+    
+    try:
+        results = sales_service.apply_sales(db, sales_data.sales, batch_keys=[(key, len(sales_data.sales))])
+    except IntegrityError:
+        # 같은 키의 요청이 동시에 처리된 경우: 먼저 커밋된 결과를 돌려준다
+        db.rollback()
+        stored = idempotency_service.lookup(db, idempotency_service.batch_key(key)) if key else None
+        if stored is not None:
+            return stored
+        raise HTTPException(status_code=409, detail="같은 멱등성 키의 매출이 이미 처리되었습니다.")
+    except Exception as e:
+        db.rollback()
+        print(f"매출 반영 오류: {e}")
+        raise HTTPException(status_code=500, detail=f"매출 반영 중 오류가 발생했습니다: {str(e)}")
     
     return {"results": results}
 
 
+def _apply_backfill_chunk(chunk: List[Tuple[int, SaleItem]], deduct: bool) -> List[Tuple[int, str]]:
+    db = SessionLocal()
+    try:
+        if deduct and inventory_service.has_uninitialized_inventory(db):
+            return [(line_no, "재고 초기화가 완료되지 않아 차감할 수 없습니다.") for line_no, _ in chunk]
+        results = sales_service.apply_sales(db, [sale for _, sale in chunk], deduct=deduct)
+        return [
+            (line_no, result.get("message", "처리 실패"))
+            for (line_no, _), result in zip(chunk, results)
+            if result["status"] != "success"
+        ]
+    except Exception as e:
+        db.rollback()
+        return [(line_no, f"청크 반영 실패: {e}") for line_no, _ in chunk]
+    finally:
+        db.close()
+
+
+@router.post("/backfill")
+async def backfill_sales(
+    request: Request,
+    chunk_size: int = Query(500, ge=1, le=5000),
+    deduct: bool = Query(False, description="true 이면 재고도 함께 차감"),
+):
+    """줄 단위 JSON(NDJSON) 매출 기록을 스트리밍으로 읽어 청크 단위 트랜잭션으로 적재한다."""
+    report = {"lines": 0, "applied": 0, "failed": 0, "chunks": 0, "errors": [], "errors_truncated": False}
+    chunk: List[Tuple[int, SaleItem]] = []
+    
+    def record_error(line_no: int, message: str):
+        report["failed"] += 1
+        if len(report["errors"]) < BACKFILL_MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line_no, "error": message})
+        else:
+            report["errors_truncated"] = True
+    
+    async def flush():
+        errors = await run_in_threadpool(_apply_backfill_chunk, chunk, deduct)
+        report["chunks"] += 1
+        report["applied"] += len(chunk) - len(errors)
+        for line_no, message in errors:
+            record_error(line_no, message)
+        print(f"매출 적재 진행: {report['lines']}줄 처리 (반영 {report['applied']}건, 실패 {report['failed']}건)")
+        chunk.clear()
+    
+    def parse(raw: bytes):
+        report["lines"] += 1
+        line_no = report["lines"]
+        line = raw.strip()
+        if not line:
+            return
+        try:
+            chunk.append((line_no, BackfillSaleItem.model_validate_json(line)))
+        except ValidationError as e:
+            record_error(line_no, str(e.errors(include_url=False)[0]["msg"]))
+    
+    buffer = b""
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            parse(raw)
+            if len(chunk) >= chunk_size:
+                await flush()
+    if buffer.strip():
+        parse(buffer)
+    if chunk:
+        await flush()
+    
+    return report
+
+
+@router.get("/batches/{batch_id}")
+def get_batch_status(batch_id: str):
+    batch = sales_queue.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="배치를 찾을 수 없습니다")
+    return batch
+
+
+@router.get("/queue/metrics")
+def get_queue_metrics():
+    return sales_queue.get_metrics()
+
+
+@router.get("/rollups/menus", response_model=List[MenuSalesRollupResponse])
+def get_menu_rollups(
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    menu_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db)
+):
+    return rollup_service.get_menu_rollups(db, granularity, start=start, end=end, menu_id=menu_id)
+
+
+@router.get("/rollups/ingredients", response_model=List[IngredientUsageRollupResponse])
+def get_ingredient_rollups(
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    inventory_item_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db)
+):
+    return rollup_service.get_ingredient_rollups(
+        db, granularity, start=start, end=end, inventory_item_id=inventory_item_id
+    )
+
+
+@router.post("/rollups/rebuild")
+def rebuild_rollups(
+    chunk_size: int = Query(5000, ge=100, le=100000),
+    db: Session = Depends(get_db)
+):
+    return rollup_service.rebuild(db, chunk_size=chunk_size)
+
+
 @router.get("/simulator/status")
 def get_simulator_status():
     return {"paused": _simulator_paused}
@@ -8,6 +8,7 @@ from app.schemas.store import (
     NotificationSettingsUpdate
 )
 from app.models.store import Store, NotificationSettings
+from app.services import inventory_events
 
 router = APIRouter(prefix="/store", tags=["가게 설정"])
 
@@ -73,5 +74,6 @@ def update_notification_settings(
     
     db.commit()
     db.refresh(settings)
+    inventory_events.configure(settings.low_stock, settings.out_of_stock)
     return settings
 
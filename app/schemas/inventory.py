@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import List, Optional
+from typing_extensions import TypedDict
 from datetime import date, datetime
 
 
@@ -44,3 +45,60 @@ class StockStatus(str):
 class InventoryItemWithStatus(InventoryItemResponse):
     status: str = Field(..., description="재고 상태: 정상/부족/품절")
 
+
+
+class InventoryPageResponse(BaseModel):
+    items: List[InventoryItemWithStatus]
+    next_cursor: Optional[int] = Field(None, description="다음 페이지 커서 (마지막 페이지면 null)")
+
+
+class InventoryChangesResponse(BaseModel):
+    items: List[InventoryItemWithStatus]
+    deleted_ids: List[int] = Field(..., description="changed_since 이후 삭제된 재고 id")
+    watermark: datetime = Field(..., description="다음 요청의 changed_since 로 사용할 시각")
+
+
+class PlannedSale(BaseModel):
+    menu_name: str
+    quantity: float = Field(..., gt=0, description="예정 판매 수량")
+    hour: Optional[int] = Field(None, ge=0, le=23, description="판매 시간대 (0~23시)")
+
+
+class StockProjectionRequest(BaseModel):
+    sales: List[PlannedSale]
+
+
+class StockProjectionItem(BaseModel):
+    item_id: int
+    name: str
+    current_quantity: float
+    planned_usage: float
+    projected_quantity: float
+    shortfall: float = Field(..., description="재고로 감당할 수 없는 사용량")
+    stockout: bool
+    stockout_hour: Optional[int] = Field(None, description="재고가 처음 모자라는 시간대 (시간대 입력 시)")
+    projected_status: str
+
+
+class StockProjectionResponse(BaseModel):
+    hourly: bool
+    items: List[StockProjectionItem]
+    unknown_menus: List[str]
+
+
+class InventoryItemRow(TypedDict):
+    """InventoryItemWithStatus 와 같은 모양의 조회 행 (검증 없이 바로 JSON 으로 직렬화)"""
+    id: int
+    name: str
+    category: str
+    quantity: float
+    unit: str
+    min_quantity: float
+    price: float
+    last_updated: date
+    created_at: datetime
+    updated_at: datetime
+    status: str
+
+
+inventory_rows_adapter = TypeAdapter(List[InventoryItemRow])
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import List, Optional
+from typing_extensions import TypedDict
 
 
 class MenuIngredientCreate(BaseModel):
@@ -30,3 +31,53 @@ class MenuResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+class MenuAvailabilityResponse(BaseModel):
+    menu_id: int
+    name: str
+    servings: Optional[int] = Field(None, description="현재 재고로 만들 수 있는 인분 수 (차감 재료가 없으면 null)")
+    limiting_ingredient: Optional[str] = Field(None, description="가장 먼저 떨어지는 재료")
+    unregistered_ingredients: List[str] = Field(default_factory=list, description="재고에 등록되지 않아 계산에서 제외된 재료")
+
+
+class MenuCostResponse(BaseModel):
+    menu_id: int
+    name: str
+    cost: float = Field(..., description="1인분 재료 원가 (재고 단가 x 레시피 사용량)")
+    unregistered_ingredients: List[str] = Field(default_factory=list, description="재고에 등록되지 않아 원가에서 제외된 재료")
+
+
+class MenuCostIngredient(BaseModel):
+    item_id: int
+    name: str
+    quantity: float
+    unit_price: float
+    cost: float
+
+
+class MenuCostDetailResponse(MenuCostResponse):
+    ingredients: List[MenuCostIngredient]
+
+
+class MenuCostRow(TypedDict):
+    menu_id: int
+    name: str
+    cost: float
+    unregistered_ingredients: List[str]
+
+
+class MenuIngredientRow(TypedDict):
+    ingredient_name: str
+    quantity: float
+    unit: str
+
+
+class MenuRow(TypedDict):
+    """MenuResponse 와 같은 모양의 조회 행 (검증 없이 바로 JSON 으로 직렬화)"""
+    id: int
+    name: str
+    ingredients: List[MenuIngredientRow]
+
+
+menu_rows_adapter = TypeAdapter(List[MenuRow])
+menu_costs_adapter = TypeAdapter(List[MenuCostRow])
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
+from typing_extensions import Annotated
 from datetime import datetime
 from enum import Enum
 
@@ -73,3 +74,40 @@ class OrderResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+class OrderStatusUpdate(BaseModel):
+    status: OrderStatus = Field(..., description="변경할 상태: confirmed / completed / cancelled")
+
+
+class OrderListResponse(BaseModel):
+    items: List[OrderResponse]
+    next_cursor: Optional[int] = Field(None, description="다음 페이지 커서 (마지막 페이지면 null)")
+
+
+class OrderOptimizeRequest(BaseModel):
+    budget: float = Field(..., gt=0, description="발주 예산")
+    pack_sizes: Dict[int, Annotated[float, Field(gt=0)]] = Field(default_factory=dict, description="재고 id 별 포장 단위 (없으면 1)")
+    horizon_days: int = Field(7, ge=1, le=60, description="최대 확보 일수")
+    window_days: int = Field(14, ge=1, le=365, description="평균 사용량을 계산할 최근 일수")
+    half_life_days: Optional[float] = Field(None, gt=0, description="최근 사용량 가중 반감기 (일)")
+
+
+class OptimizedOrderLine(BaseModel):
+    inventory_item_id: int
+    name: str
+    unit: str
+    priority: OrderPriority
+    pack_size: float
+    packs: int
+    quantity: float
+    cost: float
+    coverage_days_before: float
+    coverage_days_after: float
+
+
+class OrderOptimizeResponse(BaseModel):
+    order: OrderCreate = Field(..., description="POST /orders 에 그대로 보낼 수 있는 발주 내용")
+    lines: List[OptimizedOrderLine]
+    total_cost: float
+    remaining_budget: float
+
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class MenuSalesRollupResponse(BaseModel):
+    bucket_start: datetime
+    menu_id: int
+    menu_name: str
+    quantity: int
+    sales_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class IngredientUsageRollupResponse(BaseModel):
+    bucket_start: datetime
+    inventory_item_id: int
+    amount: float
+
+    class Config:
+        from_attributes = True
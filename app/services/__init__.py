@@ -2,10 +2,38 @@ from app.services import inventory_service
 from app.services import order_service
 from app.services import analytics_service
 from app.services import menu_service
+from app.services import sales_service
+from app.services import recipe_cache
+from app.services import sales_queue
+from app.services import idempotency_service
+from app.services import rollup_service
+from app.services import search_service
+from app.services import inventory_counters
+from app.services import data_version
+from app.services import inventory_events
+from app.services import ingredient_index
+from app.services import recipe_matrix
+from app.services import availability_service
+from app.services import projection_service
+from app.services import menu_cost_service
 
 __all__ = [
     "inventory_service",
     "order_service",
     "analytics_service",
     "menu_service",
+    "sales_service",
+    "recipe_cache",
+    "sales_queue",
+    "idempotency_service",
+    "rollup_service",
+    "search_service",
+    "inventory_counters",
+    "data_version",
+    "inventory_events",
+    "ingredient_index",
+    "recipe_matrix",
+    "availability_service",
+    "projection_service",
+    "menu_cost_service",
 ]
@@ -1,9 +1,10 @@
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from app.models.inventory import InventoryItem
-from app.models.menu import Menu, MenuIngredient
 from app.schemas.store import OutOfStockItemResponse, OutOfStockMenuResponse
 from typing import List, Dict, Set
+from app.config import settings
+from app.services import inventory_counters, ingredient_index
 
 
 def get_out_of_stock_items(db: Session) -> List[OutOfStockItemResponse]:
@@ -44,47 +45,46 @@ def get_out_of_stock_items(db: Session) -> List[OutOfStockItemResponse]:
 
 
 def get_out_of_stock_menus(db: Session) -> List[OutOfStockMenuResponse]:
-    out_of_stock_items = db.query(InventoryItem).filter(
+    last_updated_by_name: Dict[str, object] = {}
+    for name, last_updated in db.query(InventoryItem.name, InventoryItem.last_updated).filter(
         InventoryItem.quantity == 0
-    ).all()
+    ).order_by(InventoryItem.id):
+        last_updated_by_name.setdefault(name, last_updated)
     
-    if not out_of_stock_items:
+    if not last_updated_by_name:
         return []
     
-    out_of_stock_names = {item.name for item in out_of_stock_items}
+    # 품절 재료를 쓰는 메뉴만 역색인에서 바로 찾는다
+    index = ingredient_index.get_index(db)
+    affected_ids: Set[int] = set()
+    for name in last_updated_by_name:
+        affected_ids.update(index.menu_ids.get(name, ()))
     
-    all_menus = db.query(Menu).all()
     out_of_stock_menus = []
-    
     today = datetime.now().date()
     
-    for menu in all_menus:
-        missing_ingredients = []
-        max_days_out = 0
+    for menu_id in sorted(affected_ids):
+        menu_name, ingredient_names = index.menus[menu_id]
+        missing_ingredients = [name for name in ingredient_names if name in last_updated_by_name]
+        max_days_out = max(
+            max((today - last_updated_by_name[name]).days for name in missing_ingredients),
+            0
+        )
         
-        for ingredient in menu.ingredients:
-            if ingredient.ingredient_name in out_of_stock_names:
-                missing_ingredients.append(ingredient.ingredient_name)
-                item = next((i for i in out_of_stock_items if i.name == ingredient.ingredient_name), None)
-                if item:
-                    days_out = (today - item.last_updated).days
-                    max_days_out = max(max_days_out, days_out)
+        if max_days_out >= 5:
+            status = "critical"
+        elif max_days_out >= 2:
+            status = "warning"
+        else:
+            status = "recent"
         
-        if missing_ingredients:
-            if max_days_out >= 5:
-                status = "critical"
-            elif max_days_out >= 2:
-                status = "warning"
-            else:
-                status = "recent"
-            
-            out_of_stock_menus.append({
-                "id": menu.id,
-                "name": menu.name,
-                "missing_ingredients": missing_ingredients,
-                "days_out_of_stock": max_days_out,
-                "status": status
-            })
+        out_of_stock_menus.append({
+            "id": menu_id,
+            "name": menu_name,
+            "missing_ingredients": missing_ingredients,
+            "days_out_of_stock": max_days_out,
+            "status": status
+        })
     
     out_of_stock_menus.sort(key=lambda x: x["days_out_of_stock"], reverse=True)
     
@@ -92,15 +92,6 @@ def get_out_of_stock_menus(db: Session) -> List[OutOfStockMenuResponse]:
 
 
 def get_inventory_stats(db: Session):
-    all_items = db.query(InventoryItem).all()
-    
-    total_items = len(all_items)
-    low_stock_count = sum(1 for item in all_items if item.quantity <= item.min_quantity and item.quantity > 0)
-    out_of_stock_count = sum(1 for item in all_items if item.quantity == 0)
-    
-    return {
-        "total_items": total_items,
-        "low_stock_count": low_stock_count,
-        "out_of_stock_count": out_of_stock_count
-    }
-
+    if settings.INVENTORY_STATS_COUNTERS:
+        return inventory_counters.get_stats(db)
+    return inventory_counters.count_stats(db)
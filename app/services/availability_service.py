@@ -0,0 +1,129 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.inventory import InventoryItem
+from app.services import recipe_matrix
+
+
+_lock = threading.Lock()
+# 레시피 행렬 세대별 재고 벡터 (matrix.item_ids 와 같은 순서)와 계산된 메뉴별 결과
+_state: Optional[Dict] = None
+_changes_seen = 0
+
+
+def _load_stock(db: Session, matrix: recipe_matrix.RecipeMatrix) -> np.ndarray:
+    stock = np.zeros(len(matrix.item_ids), dtype=np.float64)
+    if len(matrix.item_ids):
+        quantities = dict(db.query(InventoryItem.id, InventoryItem.quantity).filter(
+            InventoryItem.id.in_(matrix.item_ids.tolist())
+        ).all())
+        stock[:] = [quantities.get(item_id, 0.0) for item_id in matrix.item_ids.tolist()]
+    return stock
+
+
+def _get_state(db: Session) -> Dict:
+    global _state
+    matrix = recipe_matrix.get_matrix(db)
+    with _lock:
+        state = _state
+        if (
+            state is not None
+            and state["matrix"] is matrix
+            and time.monotonic() - state["loaded_at"] < settings.AVAILABILITY_RESYNC_SECONDS
+        ):
+            return state
+        changes_seen = _changes_seen
+
+    stock = _load_stock(db, matrix)
+    state = {
+        "matrix": matrix,
+        "positions": {item_id: position for position, item_id in enumerate(matrix.item_ids.tolist())},
+        "stock": stock,
+        "loaded_at": time.monotonic(),
+        "servings": None
+    }
+    with _lock:
+        if changes_seen != _changes_seen:
+            # 조회 도중 반영된 변경이 있으면 다음 호출에서 다시 읽는다
+            state["loaded_at"] = 0.0
+        _state = state
+    return state
+
+
+def apply_stock_changes(changes: Iterable):
+    """커밋된 재고 변경(StockChange)의 새 수량을 재고 벡터에 바로 반영한다."""
+    global _changes_seen
+    with _lock:
+        _changes_seen += 1
+        if _state is None:
+            return
+        positions = _state["positions"]
+        for change in changes:
+            position = positions.get(change.item_id)
+            if position is not None and change.new_quantity is not None:
+                _state["stock"][position] = change.new_quantity
+                _state["servings"] = None
+
+
+def get_stock(db: Session) -> Tuple[recipe_matrix.RecipeMatrix, np.ndarray]:
+    """현재 레시피 행렬과 그 열 순서에 맞춘 재고 벡터(복사본)를 반환한다."""
+    state = _get_state(db)
+    with _lock:
+        return state["matrix"], state["stock"].copy()
+
+
+def _compute(matrix: recipe_matrix.RecipeMatrix, stock: np.ndarray):
+    """메뉴별 가능 인분 수와 제한 재료 열 번호를 한 번의 벡터 연산으로 계산한다."""
+    servings = np.full(len(matrix.menu_ids), -1, dtype=np.int64)
+    limiting = np.full(len(matrix.menu_ids), -1, dtype=np.int64)
+    if len(matrix.rows) == 0:
+        return servings, limiting
+
+    ratios = np.maximum(stock[matrix.cols], 0.0) / matrix.vals
+    # rows 는 메뉴 순으로 정렬되어 있으므로 행 구간별 최솟값을 reduceat 으로 구한다
+    starts = matrix.row_starts
+    minimums = np.minimum.reduceat(ratios, starts)
+    counts = np.diff(np.r_[starts, len(ratios)])
+    # 최솟값과 같은 원소 중 각 행의 첫 번째가 제한 재료
+    hits = np.flatnonzero(ratios == np.repeat(minimums, counts))
+    _, first = np.unique(matrix.rows[hits], return_index=True)
+    menu_rows = matrix.rows[starts]
+    # 부동소수점 오차로 10 / 0.1 = 99.999... 가 되지 않도록 보정 후 내림
+    servings[menu_rows] = np.floor(minimums + 1e-9).astype(np.int64)
+    limiting[menu_rows] = matrix.cols[hits[first]]
+    return servings, limiting
+
+
+def get_availability(db: Session, menu_id: Optional[int] = None) -> List[Dict]:
+    """메뉴별로 현재 재고로 만들 수 있는 인분 수를 반환한다.
+
+    servings 가 None 이면 재고를 차감하는 재료가 없는 메뉴다. 재고에 등록되지 않은 재료는
+    판매 차감과 마찬가지로 계산에서 제외하고 unregistered_ingredients 로 알려준다.
+    """
+    state = _get_state(db)
+    matrix = state["matrix"]
+    with _lock:
+        if state["servings"] is None:
+            state["servings"] = _to_rows(matrix, *_compute(matrix, state["stock"]))
+        rows = state["servings"]
+
+    if menu_id is None:
+        return rows
+    position = matrix.menu_position(menu_id)
+    return [] if position is None else [rows[position]]
+
+
+def _to_rows(matrix: recipe_matrix.RecipeMatrix, servings: np.ndarray, limiting: np.ndarray) -> List[Dict]:
+    rows = []
+    for position, (menu_servings, column) in enumerate(zip(servings.tolist(), limiting.tolist())):
+        rows.append({
+            "menu_id": int(matrix.menu_ids[position]),
+            "name": matrix.menu_names[position],
+            "servings": menu_servings if column >= 0 else None,
+            "limiting_ingredient": matrix.item_names[column] if column >= 0 else None,
+            "unregistered_ingredients": matrix.unregistered.get(position, [])
+        })
+    return rows
@@ -0,0 +1,61 @@
+from typing import Dict, Optional
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from app.models.data_version import DataVersion
+
+
+INVENTORY = "inventory"
+MENU = "menu"
+ORDER = "order"
+SALES = "sales"
+# 메뉴 레시피와 재고 품목 구성(추가/삭제/이름/분류/단가) — 레시피 캐시, 레시피 행렬, 짧은 검색어 색인이 이 버전을 따른다
+CATALOG = "catalog"
+
+
+def bump(db: Session, *domains: str):
+    """쓰기 트랜잭션 안에서 커밋 전에 호출해 해당 도메인의 버전을 올린다. 커밋은 호출자가 한다.
+
+    버전은 data_versions 테이블에 있으므로 쓰기가 커밋되는 순간 모든 워커에서 함께 바뀐다.
+    """
+    domains = set(domains)
+    if not domains:
+        return
+    updated = set(db.execute(
+        update(DataVersion)
+        .where(DataVersion.domain.in_(domains))
+        .values(version=DataVersion.version + 1)
+        .returning(DataVersion.domain)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+    missing = domains - updated
+    if missing:
+        db.execute(insert(DataVersion), [{"domain": domain, "version": 1} for domain in sorted(missing)])
+
+
+def get_versions(db: Session, *domains: str) -> Dict[str, int]:
+    """PK 조회 한 번으로 도메인별 현재 버전을 읽는다 (한 번도 올린 적 없으면 0)."""
+    versions = dict(db.query(DataVersion.domain, DataVersion.version).filter(DataVersion.domain.in_(domains)))
+    return {domain: versions.get(domain, 0) for domain in domains}
+
+
+def get(db: Session, domain: str) -> int:
+    return get_versions(db, domain)[domain]
+
+
+def etag(db: Session, *domains: str, extra: Optional[str] = None) -> str:
+    """주어진 도메인 버전들로 만든 약한 ETag. extra 는 버전 외에 응답을 바꾸는 값(예: 날짜)"""
+    versions = get_versions(db, *domains)
+    parts = "-".join(f"{domain[0]}{versions[domain]}" for domain in domains)
+    if extra:
+        parts += f"-{extra}"
+    return f'W/"{parts}"'
+
+
+def is_fresh(if_none_match: Optional[str], current: str) -> bool:
+    """If-None-Match 헤더가 현재 ETag 와 일치하면 True (304 응답 가능)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return current.removeprefix("W/") in tags
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.sales import IdempotencyKey
+
+
+_lock = threading.Lock()
+# 키 -> (저장 시각(monotonic), 응답). 삽입 순서가 곧 오래된 순서
+_entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+_writes = 0
+_PRUNE_EVERY = 100
+
+
+def batch_key(key: str) -> str:
+    return f"batch:{key}"
+
+
+def sale_key(key: str) -> str:
+    return f"sale:{key}"
+
+
+def _evict(now: float):
+    ttl = settings.IDEMPOTENCY_TTL_SECONDS
+    while _entries:
+        oldest_key, (stored_at, _) = next(iter(_entries.items()))
+        if len(_entries) > settings.IDEMPOTENCY_CACHE_SIZE or now - stored_at > ttl:
+            _entries.popitem(last=False)
+        else:
+            break
+
+
+def _remember(key: str, response: Any, stored_at: float):
+    _entries[key] = (stored_at, response)
+    _entries.move_to_end(key)
+
+
+def lookup_many(db: Session, keys: Iterable[str]) -> Dict[str, Any]:
+    """저장된 응답을 메모리 색인에서 먼저 찾고, 없는 키만 테이블에서 한 번에 조회한다."""
+    keys = set(keys)
+    if not keys:
+        return {}
+
+    now = time.monotonic()
+    ttl = settings.IDEMPOTENCY_TTL_SECONDS
+    found: Dict[str, Any] = {}
+    with _lock:
+        _evict(now)
+        for key in keys:
+            entry = _entries.get(key)
+            if entry is not None and now - entry[0] <= ttl:
+                found[key] = entry[1]
+
+    missing = keys - found.keys()
+    if missing:
+        wall_now = datetime.now()
+        rows = db.query(IdempotencyKey.key, IdempotencyKey.response, IdempotencyKey.created_at).filter(
+            IdempotencyKey.key.in_(missing),
+            IdempotencyKey.created_at >= wall_now - timedelta(seconds=ttl)
+        ).all()
+        with _lock:
+            for key, response, created_at in rows:
+                found[key] = response
+                _remember(key, response, now - (wall_now - created_at).total_seconds())
+            _evict(now)
+
+    return found
+
+
+def lookup(db: Session, key: str) -> Optional[Any]:
+    return lookup_many(db, [key]).get(key)
+
+
+def stage(db: Session, responses: Dict[str, Any]):
+    """응답을 현재 트랜잭션에 기록한다. 커밋 후에는 remember() 로 메모리 색인에 반영한다."""
+    global _writes
+    if not responses:
+        return
+    created_at = datetime.now()
+    db.execute(
+        insert(IdempotencyKey),
+        [
+            {"key": key, "response": response, "created_at": created_at}
+            for key, response in responses.items()
+        ]
+    )
+
+    with _lock:
+        _writes += 1
+        prune = _writes % _PRUNE_EVERY == 0
+    if prune:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.created_at < created_at - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+        ).delete(synchronize_session=False)
+
+
+def remember(responses: Dict[str, Any]):
+    now = time.monotonic()
+    with _lock:
+        for key, response in responses.items():
+            _remember(key, response, now)
+        _evict(now)
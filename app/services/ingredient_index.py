@@ -0,0 +1,55 @@
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.menu import Menu, MenuIngredient
+from app.services import data_version
+
+
+class IngredientIndex(NamedTuple):
+    # menu_id -> (메뉴 이름, 레시피 순서의 재료 이름들)
+    menus: Dict[int, Tuple[str, Tuple[str, ...]]]
+    # 재료 이름 -> 그 재료를 쓰는 menu_id (메뉴 id 순)
+    menu_ids: Dict[str, Tuple[int, ...]]
+
+
+_lock = threading.Lock()
+_index: Optional[IngredientIndex] = None
+_version = -1
+
+
+def _build(db: Session) -> IngredientIndex:
+    rows = db.query(
+        Menu.id,
+        Menu.name,
+        MenuIngredient.ingredient_name
+    ).join(
+        MenuIngredient, MenuIngredient.menu_id == Menu.id
+    ).order_by(Menu.id, MenuIngredient.id)
+
+    menus: Dict[int, Tuple[str, list]] = {}
+    menu_ids: Dict[str, list] = {}
+    for menu_id, menu_name, ingredient_name in rows:
+        menus.setdefault(menu_id, (menu_name, []))[1].append(ingredient_name)
+        ids = menu_ids.setdefault(ingredient_name, [])
+        if not ids or ids[-1] != menu_id:
+            ids.append(menu_id)
+
+    return IngredientIndex(
+        {menu_id: (name, tuple(names)) for menu_id, (name, names) in menus.items()},
+        {name: tuple(ids) for name, ids in menu_ids.items()}
+    )
+
+
+def get_index(db: Session) -> IngredientIndex:
+    """재료 이름 -> 메뉴 역색인. 메뉴 데이터 버전(CSV 업로드)이 바뀌면 다시 만든다."""
+    global _index, _version
+    # 버전을 메뉴보다 먼저 읽으므로 만든 색인이 이 버전보다 오래된 데이터일 수는 없다
+    version = data_version.get(db, data_version.MENU)
+    with _lock:
+        if _index is not None and _version == version:
+            return _index
+
+    index = _build(db)
+    with _lock:
+        _index, _version = index, version
+    return index
@@ -0,0 +1,76 @@
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+from app.models.inventory import InventoryItem
+
+
+_STATUS_KEYS = {"부족": "low_stock_count", "품절": "out_of_stock_count"}
+
+_lock = threading.Lock()
+_counts: Optional[Dict[str, int]] = None
+_version = 0
+
+
+def count_stats(db: Session) -> Dict[str, int]:
+    """전체/부족/품절 재고 수를 집계 쿼리 한 번으로 계산한다."""
+    total, low, out = db.query(
+        func.count(InventoryItem.id),
+        func.sum(case(
+            (and_(InventoryItem.quantity <= InventoryItem.min_quantity, InventoryItem.quantity > 0), 1),
+            else_=0
+        )),
+        func.sum(case((InventoryItem.quantity == 0, 1), else_=0))
+    ).one()
+    return {
+        "total_items": total or 0,
+        "low_stock_count": low or 0,
+        "out_of_stock_count": out or 0
+    }
+
+
+def get_stats(db: Session) -> Dict[str, int]:
+    """메모리 카운터를 반환한다. 아직 없거나 무효화되었으면 DB 에서 한 번 집계해 채운다."""
+    with _lock:
+        if _counts is not None:
+            return dict(_counts)
+        version = _version
+
+    counts = count_stats(db)
+    with _lock:
+        # 집계 도중 변경이 반영되었다면 이번 결과는 저장하지 않는다
+        if _counts is None and version == _version:
+            _set(counts)
+    return counts
+
+
+def _set(counts: Dict[str, int]):
+    global _counts
+    _counts = dict(counts)
+
+
+def apply(transitions: Iterable[Tuple[Optional[str], Optional[str]]]):
+    """(이전 상태, 새 상태) 목록을 카운터에 반영한다. None 은 각각 신규 생성/삭제를 뜻한다."""
+    global _version
+    with _lock:
+        _version += 1
+        if _counts is None:
+            return
+        for old_status, new_status in transitions:
+            if old_status == new_status:
+                continue
+            if old_status is None:
+                _counts["total_items"] += 1
+            elif old_status in _STATUS_KEYS:
+                _counts[_STATUS_KEYS[old_status]] -= 1
+            if new_status is None:
+                _counts["total_items"] -= 1
+            elif new_status in _STATUS_KEYS:
+                _counts[_STATUS_KEYS[new_status]] += 1
+
+
+def invalidate():
+    global _counts, _version
+    with _lock:
+        _counts = None
+        _version += 1
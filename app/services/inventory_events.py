@@ -0,0 +1,171 @@
+import asyncio
+import itertools
+import threading
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from app.config import settings
+
+
+# 느린 구독자를 끊을 때, 서버 종료 시 대기열에 넣는 표시
+DROPPED = "dropped"
+SHUTDOWN = "shutdown"
+
+_lock = threading.Lock()
+_subscribers = set()
+_sequence = itertools.count(1)
+_flags = {"low_stock": True, "out_of_stock": True}
+
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+
+
+def configure(low_stock: bool, out_of_stock: bool):
+    """알림 설정(NotificationSettings)의 부족/품절 알림 여부를 반영한다."""
+    with _lock:
+        _flags["low_stock"] = bool(low_stock)
+        _flags["out_of_stock"] = bool(out_of_stock)
+
+
+def subscribe() -> Subscriber:
+    """현재 이벤트 루프에서 사용할 구독자를 등록한다. async 엔드포인트 안에서 호출해야 한다."""
+    subscriber = Subscriber(asyncio.get_running_loop(), settings.INVENTORY_EVENTS_BUFFER)
+    with _lock:
+        _subscribers.add(subscriber)
+    return subscriber
+
+
+def unsubscribe(subscriber: Subscriber):
+    subscriber.closed = True
+    with _lock:
+        _subscribers.discard(subscriber)
+
+
+def _alert(change, flags: Dict[str, bool]) -> Optional[Dict]:
+    if change.new_status == change.old_status or change.new_quantity is None:
+        return None
+    if change.new_status == "품절":
+        if not flags["out_of_stock"]:
+            return None
+        message = f"{change.name} 재고가 품절되었습니다!"
+    elif change.new_status == "부족":
+        if not flags["low_stock"]:
+            return None
+        message = (
+            f"{change.name} 재고가 부족합니다! "
+            f"(현재: {change.new_quantity}{change.unit}, 최소: {change.min_quantity}{change.unit})"
+        )
+    else:
+        return None
+    return {"type": "alert", "item_id": change.item_id, "name": change.name, "status": change.new_status, "message": message}
+
+
+def _to_events(changes: Iterable, flags: Dict[str, bool]) -> List[Dict]:
+    events = []
+    for change in changes:
+        if change.old_quantity is None:
+            action = "created"
+        elif change.new_quantity is None:
+            action = "deleted"
+        else:
+            action = "updated"
+        events.append({
+            "type": "stock",
+            "action": action,
+            "item_id": change.item_id,
+            "name": change.name,
+            "unit": change.unit,
+            "min_quantity": change.min_quantity,
+            "old_quantity": change.old_quantity,
+            "new_quantity": change.new_quantity,
+            "old_status": change.old_status,
+            "new_status": change.new_status,
+            "status_changed": change.old_status != change.new_status
+        })
+        alert = _alert(change, flags)
+        if alert:
+            events.append(alert)
+    for event in events:
+        event["id"] = next(_sequence)
+    return events
+
+
+def _deliver(subscriber: Subscriber, events: List[Dict]):
+    # 구독자의 이벤트 루프 스레드에서 실행된다
+    if subscriber.closed:
+        return
+    for event in events:
+        try:
+            subscriber.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            _close(subscriber, DROPPED)
+            print("재고 이벤트 구독자가 버퍼를 비우지 못해 연결을 종료합니다.")
+            return
+
+
+def _close(subscriber: Subscriber, reason: str):
+    unsubscribe(subscriber)
+    while not subscriber.queue.empty():
+        subscriber.queue.get_nowait()
+    subscriber.queue.put_nowait(reason)
+
+
+def _broadcast(subscribers: List[Subscriber], events: List[Dict]):
+    for subscriber in subscribers:
+        try:
+            subscriber.loop.call_soon_threadsafe(_deliver, subscriber, events)
+        except RuntimeError:
+            # 이벤트 루프가 이미 닫힌 구독자
+            unsubscribe(subscriber)
+
+
+def publish(changes: Iterable):
+    """커밋된 재고 변경(StockChange)을 모든 구독자에게 보낸다. 어느 스레드에서든 호출할 수 있다."""
+    with _lock:
+        if not _subscribers:
+            return
+        subscribers = list(_subscribers)
+        flags = dict(_flags)
+        events = _to_events(changes, flags)
+    _broadcast(subscribers, events)
+
+
+def publish_reset():
+    """재고 전체가 지워지거나(CSV 초기화) 대량으로 등록된 커밋 뒤 구독자에게 목록을 다시 불러오라고 알린다."""
+    with _lock:
+        if not _subscribers:
+            return
+        subscribers = list(_subscribers)
+        events = [{"type": "reset", "id": next(_sequence), "message": "재고 목록이 크게 바뀌었습니다. 다시 불러오세요."}]
+    _broadcast(subscribers, events)
+
+
+async def listen(subscriber: Subscriber, keepalive: float) -> AsyncIterator:
+    """이벤트 dict 를 차례로 내보낸다. keepalive 초 동안 이벤트가 없으면 None 을 내보낸다.
+
+    버퍼가 넘쳐 끊기거나 서버가 종료되면 DROPPED/SHUTDOWN 문자열을 마지막으로 내보낸다.
+    """
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            yield event
+            if isinstance(event, str):
+                return
+    finally:
+        unsubscribe(subscriber)
+
+
+def shutdown():
+    with _lock:
+        subscribers = list(_subscribers)
+    for subscriber in subscribers:
+        try:
+            subscriber.loop.call_soon_threadsafe(_close, subscriber, SHUTDOWN)
+        except RuntimeError:
+            unsubscribe(subscriber)
@@ -1,27 +1,177 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from app.models.inventory import InventoryItem
+from sqlalchemy import or_, and_, case, delete, func, insert, select
+from app.models.inventory import InventoryItem, InventoryTombstone
 from app.schemas.inventory import InventoryItemCreate, InventoryItemUpdate
-from datetime import date
+from app.services import search_service, inventory_counters, data_version, inventory_events
+from app.services import availability_service
+from datetime import date, datetime
+from typing import Dict, List, NamedTuple, Optional
+
+
+class StockChange(NamedTuple):
+    item_id: int
+    name: str
+    unit: str
+    min_quantity: float
+    # None 이면 각각 신규 생성/삭제
+    old_quantity: Optional[float]
+    new_quantity: Optional[float]
+    old_min_quantity: Optional[float] = None
+
+    @property
+    def old_status(self) -> Optional[str]:
+        if self.old_quantity is None:
+            return None
+        min_quantity = self.min_quantity if self.old_min_quantity is None else self.old_min_quantity
+        return get_stock_status(self.old_quantity, min_quantity)
+
+    @property
+    def new_status(self) -> Optional[str]:
+        if self.new_quantity is None:
+            return None
+        return get_stock_status(self.new_quantity, self.min_quantity)
+
+
+def publish_stock_changes(changes: List[StockChange]):
+    """커밋된 재고 변경을 메모리 카운터, 가능 인분 재고 벡터, 실시간 이벤트 구독자에 반영한다.
+
+    데이터 버전(data_version.INVENTORY)은 워커 간에 공유되므로 호출자가 커밋 전에 올린다.
+    """
+    if not changes:
+        return
+    inventory_counters.apply((change.old_status, change.new_status) for change in changes)
+    availability_service.apply_stock_changes(changes)
+    inventory_events.publish(changes)
+
+
+def publish_inventory_reset():
+    """재고 전체를 지우거나 대량으로 등록한 커밋 뒤 메모리 카운터를 버리고 구독자에게 reset 이벤트를 보낸다.
+
+    바뀐 품목마다 이벤트를 보내는 대신 한 번에 알리며, 가능 인분 재고 벡터는 레시피 행렬이
+    바뀌면서 다시 읽힌다.
+    """
+    inventory_counters.invalidate()
+    inventory_events.publish_reset()
+
+
+def _filter_search(db: Session, query, search: str):
+    if search_service.uses_index(search):
+        return query.filter(InventoryItem.id.in_(search_service.inventory_match_ids(search)))
+    short_ids = search_service.short_inventory_ids(db, search)
+    if short_ids is not None:
+        return query.filter(InventoryItem.id.in_(short_ids))
+    search_term = f"%{search}%"
+    return query.filter(
+        or_(
+            InventoryItem.name.like(search_term),
+            InventoryItem.category.like(search_term)
+        )
+    )
+
+
+def stock_status_expression():
+    """get_stock_status 와 같은 규칙의 SQL CASE 식"""
+    return case(
+        (InventoryItem.quantity == 0, "품절"),
+        (InventoryItem.quantity <= InventoryItem.min_quantity, "부족"),
+        else_="정상"
+    )
+
+
+def _row_query(db: Session):
+    # 응답에 필요한 컬럼만 튜플로 조회 (ORM 객체 생성 없이 상태까지 SQL 에서 계산)
+    return db.query(
+        InventoryItem.id,
+        InventoryItem.name,
+        InventoryItem.category,
+        InventoryItem.quantity,
+        InventoryItem.unit,
+        InventoryItem.min_quantity,
+        InventoryItem.price,
+        InventoryItem.last_updated,
+        InventoryItem.created_at,
+        InventoryItem.updated_at,
+        stock_status_expression().label("status")
+    )
+
+
+def get_inventory_rows(db: Session, skip: int = 0, limit: int = 1000, search: str = None) -> List[Dict]:
+    """get_inventory_items 와 같은 목록을 상태 포함 dict 행으로 반환한다."""
+    query = _row_query(db)
+    if search:
+        query = _filter_search(db, query, search)
+    
+    rows = [row._asdict() for row in query.offset(skip).limit(limit)]
+    print(f"재고 목록: 총 {len(rows)}개 항목 반환 (skip={skip}, limit={limit}, search={search})")
+    return rows
+
+
+def get_low_stock_rows(db: Session) -> List[Dict]:
+    return [
+        row._asdict() for row in _row_query(db).filter(
+            InventoryItem.quantity <= InventoryItem.min_quantity,
+            InventoryItem.quantity > 0
+        )
+    ]
 
 
 def get_inventory_items(db: Session, skip: int = 0, limit: int = 1000, search: str = None):
     query = db.query(InventoryItem)
     
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                InventoryItem.name.like(search_term),
-                InventoryItem.category.like(search_term)
-            )
-        )
+        query = _filter_search(db, query, search)
     
     items = query.offset(skip).limit(limit).all()
     print(f"재고 목록: 총 {len(items)}개 항목 반환 (skip={skip}, limit={limit}, search={search})")
     return items
 
 
+def get_inventory_page(db: Session, cursor: Optional[int] = None, limit: int = 500, search: str = None):
+    query = db.query(InventoryItem)
+    if cursor is not None:
+        query = query.filter(InventoryItem.id > cursor)
+    if search:
+        query = _filter_search(db, query, search)
+    
+    items = query.order_by(InventoryItem.id).limit(limit).all()
+    next_cursor = items[-1].id if len(items) == limit else None
+    return items, next_cursor
+
+
+def get_inventory_changes(db: Session, changed_since: datetime) -> Dict:
+    # 조회 전에 DB 시각을 워터마크로 잡아 두고, 다음 요청은 그 시각 이상(>=)으로 조회해 누락을 막는다
+    watermark = db.query(func.now()).scalar()
+    if isinstance(watermark, str):
+        watermark = datetime.fromisoformat(watermark)
+    
+    # updated_at/deleted_at 은 SQLite 가 'YYYY-MM-DD HH:MM:SS' 문자열로 저장하므로 바인딩 값도
+    # datetime() 으로 같은 형식으로 맞춰 비교한다 (그대로 비교하면 '.000000' 때문에 같은 초의 변경이 빠진다)
+    since = func.datetime(changed_since)
+    items = db.query(InventoryItem).filter(
+        InventoryItem.updated_at >= since
+    ).order_by(InventoryItem.id).all()
+    
+    live_ids = {item.id for item in items}
+    deleted_ids = [
+        item_id
+        for (item_id,) in db.query(InventoryTombstone.item_id).filter(
+            InventoryTombstone.deleted_at >= since
+        ).order_by(InventoryTombstone.item_id)
+        if item_id not in live_ids
+    ]
+    return {"items": items, "deleted_ids": deleted_ids, "watermark": watermark}
+
+
+def record_tombstones(db: Session, item_ids=None):
+    """삭제될 재고의 id 를 기록한다. item_ids 가 None 이면 전체 재고가 대상이다. 커밋은 호출자가 한다."""
+    source = select(InventoryItem.id)
+    if item_ids is not None:
+        source = source.where(InventoryItem.id.in_(item_ids))
+    # id 가 재사용된 뒤 다시 삭제되는 경우를 위해 기존 기록은 지우고 새로 남긴다
+    db.execute(delete(InventoryTombstone).where(InventoryTombstone.item_id.in_(source)))
+    db.execute(insert(InventoryTombstone).from_select(["item_id"], source))
+
+
 def get_inventory_item(db: Session, item_id: int):
     return db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
 
@@ -37,8 +187,12 @@ def create_inventory_item(db: Session, item: InventoryItemCreate):
         last_updated=date.today()
     )
     db.add(db_item)
+    data_version.bump(db, data_version.INVENTORY, data_version.CATALOG)
     db.commit()
     db.refresh(db_item)
+    publish_stock_changes([StockChange(
+        db_item.id, db_item.name, db_item.unit, db_item.min_quantity, None, db_item.quantity
+    )])
     return db_item
 
 
@@ -53,12 +207,21 @@ def update_inventory_item(db: Session, item_id: int, item: InventoryItemUpdate):
     else:
         update_data = item.dict(exclude_unset=True)
     
+    old_quantity = db_item.quantity
+    old_min_quantity = db_item.min_quantity
     for field, value in update_data.items():
         setattr(db_item, field, value)
     
     db_item.last_updated = date.today()
+    # 이름은 레시피의 재고 id 매칭을, 단가는 메뉴 원가를, 이름/분류는 짧은 검색어 색인을 바꾼다
+    catalog_changed = bool({"name", "category", "price"} & update_data.keys())
+    data_version.bump(db, data_version.INVENTORY, *([data_version.CATALOG] if catalog_changed else []))
     db.commit()
     db.refresh(db_item)
+    publish_stock_changes([StockChange(
+        db_item.id, db_item.name, db_item.unit, db_item.min_quantity,
+        old_quantity, db_item.quantity, old_min_quantity
+    )])
     return db_item
 
 
@@ -66,8 +229,14 @@ def delete_inventory_item(db: Session, item_id: int):
     db_item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
     if not db_item:
         return False
+    removed = StockChange(
+        db_item.id, db_item.name, db_item.unit, db_item.min_quantity, db_item.quantity, None
+    )
+    record_tombstones(db, [item_id])
     db.delete(db_item)
+    data_version.bump(db, data_version.INVENTORY, data_version.CATALOG)
     db.commit()
+    publish_stock_changes([removed])
     return True
 
 
@@ -0,0 +1,81 @@
+import threading
+from typing import Dict, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models.inventory import InventoryItem
+from app.schemas.menu import menu_costs_adapter
+from app.services import recipe_matrix
+
+
+_lock = threading.Lock()
+# 레시피 행렬과 단가로 계산한 메뉴별 원가. 단가 수정도 CATALOG 버전을 올리므로 행렬이 바뀌면 다시 계산한다
+_cache: Optional[Dict] = None
+
+
+def _get_cache(db: Session) -> Dict:
+    global _cache
+    matrix = recipe_matrix.get_matrix(db)
+    with _lock:
+        if _cache is not None and _cache["matrix"] is matrix:
+            return _cache
+
+    prices = np.zeros(len(matrix.item_ids), dtype=np.float64)
+    if len(matrix.item_ids):
+        price_by_id = dict(db.query(InventoryItem.id, InventoryItem.price).filter(
+            InventoryItem.id.in_(matrix.item_ids.tolist())
+        ).all())
+        prices[:] = [price_by_id.get(item_id, 0.0) for item_id in matrix.item_ids.tolist()]
+
+    # 메뉴별 원가 = sum(1인분 사용량 x 단가) 를 행 번호로 한 번에 합산
+    entry_costs = matrix.vals * prices[matrix.cols]
+    costs = np.bincount(matrix.rows, weights=entry_costs, minlength=len(matrix.menu_ids))
+    menus = [
+        {
+            "menu_id": menu_id,
+            "name": matrix.menu_names[position],
+            "cost": cost,
+            "unregistered_ingredients": matrix.unregistered.get(position, [])
+        }
+        for position, (menu_id, cost) in enumerate(zip(matrix.menu_ids.tolist(), costs.tolist()))
+    ]
+    cache = {
+        "matrix": matrix,
+        "prices": prices,
+        "entry_costs": entry_costs,
+        "menus": menus,
+        "payload": None
+    }
+    with _lock:
+        if _cache is None or _cache["matrix"].generation <= matrix.generation:
+            _cache = cache
+    return cache
+
+
+def get_menu_costs_json(db: Session) -> bytes:
+    """전체 메뉴 원가 목록을 JSON 바이트로 반환한다 (원가가 바뀌기 전까지 재사용)."""
+    cache = _get_cache(db)
+    if cache["payload"] is None:
+        cache["payload"] = menu_costs_adapter.dump_json(cache["menus"])
+    return cache["payload"]
+
+
+def get_menu_cost(db: Session, menu_id: int) -> Optional[Dict]:
+    """메뉴 한 개의 원가와 재료별 내역"""
+    cache = _get_cache(db)
+    matrix = cache["matrix"]
+    position = matrix.menu_position(menu_id)
+    if position is None:
+        return None
+
+    start, end = np.searchsorted(matrix.rows, [position, position + 1])
+    ingredients = [
+        {
+            "item_id": int(matrix.item_ids[column]),
+            "name": matrix.item_names[column],
+            "quantity": float(matrix.vals[k]),
+            "unit_price": float(cache["prices"][column]),
+            "cost": float(cache["entry_costs"][k])
+        }
+        for k, column in zip(range(start, end), matrix.cols[start:end].tolist())
+    ]
+    return {**cache["menus"][position], "ingredients": ingredients}
@@ -1,206 +1,315 @@
-from typing import List, Dict, Set, Tuple
+import csv
+import io
+from datetime import date
+from itertools import islice
+from typing import BinaryIO, List, Dict, Iterable, Iterator, Optional, Tuple
+from sqlalchemy import delete, insert, update
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.models.menu import Menu, MenuIngredient
 from app.models.inventory import InventoryItem
 from app.schemas.menu import MenuCreate, MenuIngredientCreate
-from app.schemas.inventory import InventoryItemCreate
-from app.services import inventory_service
+from app.services import inventory_service, data_version
 
 
-def parse_menu_csv(csv_content: str) -> List[MenuCreate]:
-    menus = []
-    lines = csv_content.strip().split('\n')
-    print(f"CSV 라인 수: {len(lines)}")
-    
-    for line_idx, line in enumerate(lines, 1):
-        if not line.strip():
+# 업로드 응답에 담는 CSV 파싱 오류 최대 개수 (이후 오류는 개수만 요약)
+MAX_CSV_ERRORS = 100
+# 업로드 응답에 예시로 담는 메뉴/재료 이름 최대 개수 (전체는 개수로만 알려준다)
+MAX_IMPORT_SAMPLES = 20
+
+
+def _csv_error(errors: List[Dict], line: int, message: str, menu_name: str = None, value: str = None):
+    if len(errors) < MAX_CSV_ERRORS:
+        errors.append({"line": line, "menu_name": menu_name, "value": value, "message": message})
+    elif len(errors) == MAX_CSV_ERRORS:
+        errors.append({"line": line, "menu_name": None, "value": None, "message": "오류가 너무 많아 이후 오류는 생략합니다"})
+
+
+def _parse_menu_rows(reader, errors: List[Dict]) -> Iterator[MenuCreate]:
+    """csv.reader 의 각 행(메뉴명,재료1-수량1,재료2-수량2,...)을 MenuCreate 로 바꿔 하나씩 내보낸다.
+
+    형식이 잘못된 재료는 건너뛰고 errors 에 (라인 번호, 메뉴명, 값, 사유)를 남긴다.
+    """
+    parsed = 0
+    for row in reader:
+        line = reader.line_num
+        if not any(part.strip() for part in row):
             continue
-            
-        parts = [p.strip() for p in line.split(',')]
-        if len(parts) < 2:
-            print(f"라인 {line_idx}: 재료가 없음 (파트 수: {len(parts)})")
+        
+        menu_name = row[0].strip()
+        if not menu_name:
+            _csv_error(errors, line, "메뉴명이 비어있습니다")
             continue
-            
-        menu_name = parts[0].strip()
-        ingredients = []
         
-        for ingredient_str in parts[1:]:
+        ingredients = []
+        for ingredient_str in row[1:]:
             ingredient_str = ingredient_str.strip()
             if not ingredient_str:
                 continue
-                
-            if '-' in ingredient_str:
-                name_part, qty_part = ingredient_str.rsplit('-', 1)
-                try:
-                    quantity = float(qty_part)
-                    ingredient_name = name_part.strip()
-                    
-                    if ingredient_name:
-                        ingredients.append(MenuIngredientCreate(
-                            ingredient_name=ingredient_name,
-                            quantity=quantity,
-                            unit="ml"
-                        ))
-                        print(f"  ✓ 재료 파싱 성공: {ingredient_name}-{quantity}")
-                    else:
-                        print(f"재료명이 비어있음: '{ingredient_str}'")
-                except ValueError as e:
-                    print(f"수량 파싱 실패: '{ingredient_str}' - {e}")
-                    continue
-            else:
-                print(f"재료 형식 오류 (하이픈 없음): '{ingredient_str}'")
+            if '-' not in ingredient_str:
+                _csv_error(errors, line, "재료 형식 오류 (하이픈 없음)", menu_name, ingredient_str)
+                continue
+            
+            name_part, qty_part = ingredient_str.rsplit('-', 1)
+            ingredient_name = name_part.strip()
+            if not ingredient_name:
+                _csv_error(errors, line, "재료명이 비어있습니다", menu_name, ingredient_str)
+                continue
+            try:
+                quantity = float(qty_part)
+            except ValueError:
+                _csv_error(errors, line, "수량 파싱 실패", menu_name, ingredient_str)
+                continue
+            ingredients.append(MenuIngredientCreate(ingredient_name=ingredient_name, quantity=quantity, unit="ml"))
         
-        if ingredients:
-            menus.append(MenuCreate(name=menu_name, ingredients=ingredients))
-            print(f"메뉴 추가: {menu_name} ({len(ingredients)}개 재료)")
-        else:
-            print(f"라인 {line_idx}: 재료가 없어서 메뉴 추가 안 됨: {menu_name}")
+        if not ingredients:
+            _csv_error(errors, line, "재료가 없어서 메뉴를 추가하지 않았습니다", menu_name)
+            continue
+        parsed += 1
+        yield MenuCreate(name=menu_name, ingredients=ingredients)
+    print(f"CSV 파싱 완료: {reader.line_num}개 라인, 메뉴 {parsed}개, 오류 {len(errors)}건")
+
+
+def iter_menu_csv(stream: BinaryIO, errors: List[Dict]) -> Iterator[MenuCreate]:
+    """업로드된 CSV 바이너리 스트림을 조금씩 읽으며 MenuCreate 를 하나씩 내보낸다.
+
+    파일 전체를 메모리에 올리지 않으며, UTF-8 BOM 과 따옴표로 감싼 필드를 처리한다.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        yield from _parse_menu_rows(csv.reader(text), errors)
+    finally:
+        # 래퍼가 정리될 때 업로드 파일까지 닫지 않도록 분리
+        text.detach()
+
+
+def parse_menu_csv(csv_content: str, errors: Optional[List[Dict]] = None) -> List[MenuCreate]:
+    errors = [] if errors is None else errors
+    reader = csv.reader(io.StringIO(csv_content.lstrip("\ufeff"), newline=""))
+    return list(_parse_menu_rows(reader, errors))
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _register_ingredients(db: Session, names: Iterable[str]) -> Tuple[List[str], List[Dict]]:
+    """묶음에 나온 재료 이름을 한 번의 IN 조회로 확인하고, 재고에 없는 것만 초기화 상태로 일괄 등록한다.
+
+    (묶음에 나온 재료 이름, 새로 등록한 재고 행 목록)을 반환한다.
+    """
+    pending = list(dict.fromkeys(names))
+    if not pending:
+        return [], []
     
-    return menus
+    existing = {
+        name for (name,) in db.query(InventoryItem.name).filter(InventoryItem.name.in_(pending))
+    }
+    new_names = [name for name in pending if name not in existing]
+    if not new_names:
+        return pending, []
+    today = date.today()
+    created = db.execute(
+        insert(InventoryItem).returning(
+            InventoryItem.id,
+            InventoryItem.name,
+            InventoryItem.unit,
+            InventoryItem.quantity,
+            InventoryItem.min_quantity
+        ),
+        [
+            {"name": name, "category": "-", "quantity": 0, "unit": "-", "min_quantity": 0, "price": 0, "last_updated": today}
+            for name in new_names
+        ]
+    ).all()
+    return pending, [row._asdict() for row in created]
 
 
-def create_menu_from_csv(db: Session, csv_content: str, mode: str = "add") -> Tuple[List[Menu], List[InventoryItem], Dict[str, int]]:
-    mode = (mode or "add").lower()
-    if mode not in {"add", "reset"}:
-        mode = "add"
-    print(f"메뉴 업로드 모드: {mode}")
-    print(f"CSV 내용 파싱 시작...")
-    print(f"CSV 내용 (처음 500자): {csv_content[:500]}")
+def _upsert_menus(db: Session, menus: List[MenuCreate]) -> Tuple[int, int, Dict[str, Dict]]:
+    """메뉴 묶음을 기존 메뉴/재료와 메모리에서 비교해 새 행은 일괄 INSERT, 바뀐 재료는 일괄 UPDATE 한다.
+
+    같은 메뉴가 여러 번 나오면 앞에서부터 차례로 반영한 것과 같다.
+    (생성 수, 업데이트 수, 이 묶음의 메뉴 이름 -> MenuResponse 모양 dict)를 반환한다.
+    """
+    names = list(dict.fromkeys(menu.name for menu in menus))
+    existing = dict(db.query(Menu.name, Menu.id).filter(Menu.name.in_(names)))
     
-    menus = parse_menu_csv(csv_content)
-    print(f"파싱된 메뉴 수: {len(menus)}")
-    for menu in menus:
-        print(f"  - {menu.name}: {len(menu.ingredients)}개 재료")
-        for ing in menu.ingredients:
-            print(f"    * {ing.ingredient_name} ({ing.quantity})")
+    # 메뉴 id(새 메뉴는 이름) -> 재료 이름 -> 재료 행
+    recipes: Dict = {}
+    if existing:
+        for row in db.query(
+            MenuIngredient.id,
+            MenuIngredient.menu_id,
+            MenuIngredient.ingredient_name,
+            MenuIngredient.quantity,
+            MenuIngredient.unit
+        ).filter(MenuIngredient.menu_id.in_(existing.values())).order_by(MenuIngredient.id):
+            recipes.setdefault(row.menu_id, {})[row.ingredient_name] = row._asdict()
     
-    all_ingredients: Set[str] = set()
+    created_names = []
+    menus_updated = 0
     for menu_data in menus:
+        if menu_data.name in existing:
+            key = existing[menu_data.name]
+            menus_updated += 1
+        else:
+            key = menu_data.name
+            if key in recipes:
+                menus_updated += 1
+            else:
+                created_names.append(key)
+        recipe = recipes.setdefault(key, {})
         for ing_data in menu_data.ingredients:
-            all_ingredients.add(ing_data.ingredient_name)
-    
-    print(f"수집된 고유 재료 수: {len(all_ingredients)}")
-    print(f"재료 목록: {list(all_ingredients)}")
+            current = recipe.get(ing_data.ingredient_name)
+            if current is None:
+                recipe[ing_data.ingredient_name] = {
+                    "ingredient_name": ing_data.ingredient_name,
+                    "quantity": ing_data.quantity,
+                    "unit": ing_data.unit
+                }
+            elif current["quantity"] != ing_data.quantity or current["unit"] != ing_data.unit:
+                current["quantity"] = ing_data.quantity
+                current["unit"] = ing_data.unit
+                current["changed"] = True
     
-    if len(all_ingredients) == 0:
-        print("경고: 수집된 재료가 없습니다! CSV 형식을 확인하세요.")
-        print("   예상 형식: 메뉴명,재료1-수량1,재료2-수량2,...")
+    if created_names:
+        # 메뉴 이름은 유일하므로 RETURNING 순서와 관계없이 이름으로 id 를 찾는다
+        for menu_id, name in db.execute(
+            insert(Menu).returning(Menu.id, Menu.name),
+            [{"name": name} for name in created_names]
+        ).all():
+            existing[name] = menu_id
+            recipes[menu_id] = recipes.pop(name)
     
-    if mode == "reset":
-        print("'초기화' 모드: 기존 메뉴, 재료, 재고를 모두 삭제합니다.")
-        db.query(MenuIngredient).delete()
-        db.query(Menu).delete()
-        db.query(InventoryItem).delete()
-        db.commit()
-        print("기존 메뉴/재료/재고 삭제 완료.")
+    new_rows = []
+    changed_rows = []
+    for name in names:
+        menu_id = existing[name]
+        for ingredient in recipes[menu_id].values():
+            if "id" not in ingredient:
+                new_rows.append({"menu_id": menu_id, **ingredient})
+            elif ingredient.pop("changed", False):
+                changed_rows.append({
+                    "id": ingredient["id"],
+                    "quantity": ingredient["quantity"],
+                    "unit": ingredient["unit"]
+                })
+    if new_rows:
+        db.execute(insert(MenuIngredient), new_rows)
+    if changed_rows:
+        db.execute(update(MenuIngredient), changed_rows)
     
-    created_inventory_items = []
-    skipped_items = []
-    new_items_count = 0
-    print(f"총 {len(all_ingredients)}개 재료를 재고에 등록 시도...")
+    results = {}
+    for name in names:
+        menu_id = existing[name]
+        results[name] = {
+            "id": menu_id,
+            "name": name,
+            "ingredients": [
+                {"ingredient_name": ing["ingredient_name"], "quantity": ing["quantity"], "unit": ing["unit"]}
+                for ing in recipes[menu_id].values()
+            ]
+        }
+    print(f"메뉴 {len(menus)}개 처리 - 새로 생성: {len(created_names)}개, 업데이트: {menus_updated}개, "
+          f"재료 추가: {len(new_rows)}개, 재료 변경: {len(changed_rows)}개")
+    return len(created_names), menus_updated, results
+
+
+def import_menus(db: Session, menus: Iterable[MenuCreate], mode: str = "add") -> Tuple[List[Dict], List[str], Dict]:
+    """파싱된 메뉴를 MENU_IMPORT_CHUNK_SIZE 개씩 묶어 한 트랜잭션으로 가져온다.
+
+    묶음마다 기존 재고/메뉴/재료를 IN 조회 한 번씩으로 읽고 새 행은 일괄 INSERT 하므로
+    메뉴 수와 관계없이 묶음당 쿼리 수가 일정하다. 묶음을 DB 에 쓰고 나면 그 묶음의 상태는
+    버리고 개수만 누적하므로 파일 크기와 관계없이 메모리 사용량이 일정하다.
+    (메뉴 예시 최대 MAX_IMPORT_SAMPLES 개, 재료 이름 예시, 통계)를 반환한다.
+    실패하면 초기화까지 모두 롤백된다.
+    """
+    mode = (mode or "add").lower()
+    if mode not in {"add", "reset"}:
+        mode = "add"
+    print(f"메뉴 업로드 모드: {mode}")
     
-    for ingredient_name in all_ingredients:
-        if not ingredient_name or not ingredient_name.strip():
-            continue
-            
-        ingredient_name = ingredient_name.strip()
-        
-        existing_item = db.query(InventoryItem).filter(
-            InventoryItem.name == ingredient_name
-        ).first()
+    # 새로 등록한 재고는 구독자 버퍼에 들어갈 만큼만 품목별 이벤트로 보내고, 넘치면 reset 으로 알린다
+    max_stock_events = settings.INVENTORY_EVENTS_BUFFER // 2
+    new_items: List[Dict] = []
+    sample_menus: Dict[str, Dict] = {}
+    sample_ingredients: Dict[str, None] = {}
+    stats = {
+        "mode": mode,
+        "menus_count": 0,
+        "menus_created": 0,
+        "menus_updated": 0,
+        "inventory_registered": 0,
+        "menus_truncated": False
+    }
+    ingredients_seen = 0
+    try:
+        if mode == "reset":
+            print("'초기화' 모드: 기존 메뉴, 재료, 재고를 모두 삭제합니다.")
+            db.execute(delete(MenuIngredient))
+            db.execute(delete(Menu))
+            inventory_service.record_tombstones(db)
+            db.execute(delete(InventoryItem))
         
-        if not existing_item:
-            inventory_data = InventoryItemCreate(
-                name=ingredient_name,
-                category="-",
-                quantity=0,
-                unit="-",
-                min_quantity=0,
-                price=0
+        for chunk in _chunks(menus, settings.MENU_IMPORT_CHUNK_SIZE):
+            names, created_items = _register_ingredients(
+                db, (ing.ingredient_name for menu in chunk for ing in menu.ingredients)
             )
-            try:
-                print(f"재고 생성 시도: {ingredient_name}...")
-                new_item = inventory_service.create_inventory_item(db, inventory_data)
-                created_inventory_items.append(new_item)
-                new_items_count += 1
-                print(f"재고 등록 성공: {ingredient_name} (ID: {new_item.id}, 초기화 상태)")
-            except Exception as e:
-                print(f"재고 등록 실패 ({ingredient_name}): {e}")
-                import traceback
-                traceback.print_exc()
-        else:
-            skipped_items.append(ingredient_name)
-            print(f"재고에 이미 존재: {ingredient_name} (ID: {existing_item.id})")
-            created_inventory_items.append(existing_item)
-    
-    print(f"재고 등록 완료: 총 {len(created_inventory_items)}개 항목 처리됨")
-    print(f"   - 신규 등록: {new_items_count}개")
-    print(f"   - 기존 항목: {len(skipped_items)}개")
-    
-    actual_count = db.query(InventoryItem).count()
-    print(f"실제 DB의 재고 항목 수: {actual_count}개")
-    
-    if new_items_count == 0 and len(all_ingredients) > 0:
-        print(f"경고: {len(all_ingredients)}개 재료가 수집되었지만 신규 등록된 항목이 없습니다.")
-        print(f"   모든 재료가 이미 재고에 존재하거나 등록에 실패했을 수 있습니다.")
-    
-    created_menus = []
-    menus_created = 0
-    menus_updated = 0
-    for menu_data in menus:
-        existing_menu = None
-        if mode == "add":
-            existing_menu = db.query(Menu).filter(Menu.name == menu_data.name).first()
-        
-        if existing_menu:
-            menus_updated += 1
-            print(f"기존 메뉴 업데이트: {menu_data.name}")
-            existing_ingredients = {
-                ing.ingredient_name: ing for ing in existing_menu.ingredients
-            }
-            for ing_data in menu_data.ingredients:
-                current = existing_ingredients.get(ing_data.ingredient_name)
-                if current:
-                    current.quantity = ing_data.quantity
-                    current.unit = ing_data.unit
-                    print(f"재료 업데이트: {ing_data.ingredient_name} -> {ing_data.quantity}{ing_data.unit}")
+            ingredients_seen += len(names)
+            stats["inventory_registered"] += len(created_items)
+            if len(new_items) <= max_stock_events:
+                new_items.extend(created_items[:max_stock_events + 1 - len(new_items)])
+            for name in names[:MAX_IMPORT_SAMPLES - len(sample_ingredients)]:
+                sample_ingredients[name] = None
+            
+            created, updated, results = _upsert_menus(db, chunk)
+            stats["menus_created"] += created
+            stats["menus_updated"] += updated
+            for name, menu in results.items():
+                # 예시에 이미 있는 메뉴는 나중 묶음의 내용으로 갱신한다
+                if name in sample_menus or len(sample_menus) < MAX_IMPORT_SAMPLES:
+                    sample_menus[name] = menu
                 else:
-                    db_ingredient = MenuIngredient(
-                        menu_id=existing_menu.id,
-                        ingredient_name=ing_data.ingredient_name,
-                        quantity=ing_data.quantity,
-                        unit=ing_data.unit
-                    )
-                    db.add(db_ingredient)
-                    print(f"재료 추가: {ing_data.ingredient_name} ({ing_data.quantity}{ing_data.unit})")
-            created_menus.append(existing_menu)
+                    stats["menus_truncated"] = True
+        if mode == "reset" or stats["inventory_registered"]:
+            data_version.bump(db, data_version.INVENTORY, data_version.MENU, data_version.CATALOG)
         else:
-            menus_created += 1
-            db_menu = Menu(name=menu_data.name)
-            db.add(db_menu)
-            db.flush()
-            
-            for ing_data in menu_data.ingredients:
-                db_ingredient = MenuIngredient(
-                    menu_id=db_menu.id,
-                    ingredient_name=ing_data.ingredient_name,
-                    quantity=ing_data.quantity,
-                    unit=ing_data.unit
-                )
-                db.add(db_ingredient)
-            
-            created_menus.append(db_menu)
+            data_version.bump(db, data_version.MENU, data_version.CATALOG)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     
-    print(f"메뉴 처리 결과 - 새로 생성: {menus_created}개, 업데이트: {menus_updated}개")
+    if mode == "reset" or len(new_items) > max_stock_events:
+        # 삭제 기록(tombstone)을 남긴 전체 재고 삭제나 대량 등록은 품목별 이벤트 대신 reset 으로 알린다
+        inventory_service.publish_inventory_reset()
+    else:
+        inventory_service.publish_stock_changes([
+            inventory_service.StockChange(
+                item["id"], item["name"], item["unit"], item["min_quantity"], None, item["quantity"]
+            )
+            for item in new_items
+        ])
     
-    db.commit()
-    stats = {
-        "mode": mode,
-        "menus_created": menus_created,
-        "menus_updated": menus_updated if mode == "add" else 0,
-        "inventory_registered": new_items_count
-    }
-    return created_menus, created_inventory_items, stats
+    stats["menus_count"] = stats["menus_created"] + stats["menus_updated"]
+    print(f"재고 등록 완료: 재료 확인 {ingredients_seen}건 (신규 {stats['inventory_registered']}개)")
+    print(f"메뉴 처리 결과 - 새로 생성: {stats['menus_created']}개, 업데이트: {stats['menus_updated']}개")
+    if not ingredients_seen:
+        print("경고: 수집된 재료가 없습니다! CSV 형식을 확인하세요.")
+        print("   예상 형식: 메뉴명,재료1-수량1,재료2-수량2,...")
+    if mode == "reset":
+        stats["menus_updated"] = 0
+    return list(sample_menus.values()), list(sample_ingredients), stats
+
+
+def create_menu_from_csv(db: Session, csv_content: str, mode: str = "add") -> Tuple[List[Dict], List[str], Dict]:
+    print(f"CSV 내용 파싱 시작...")
+    return import_menus(db, parse_menu_csv(csv_content), mode)
 
 
 def get_menu_ingredients(db: Session, menu_name: str) -> List[Dict]:
@@ -221,3 +330,25 @@ def get_menu_ingredients(db: Session, menu_name: str) -> List[Dict]:
 def get_all_menus(db: Session):
     return db.query(Menu).all()
 
+
+def get_menu_rows(db: Session) -> List[Dict]:
+    """메뉴와 재료를 조인 한 번으로 조회해 MenuResponse 모양의 dict 로 묶는다."""
+    rows = db.query(
+        Menu.id,
+        Menu.name,
+        MenuIngredient.ingredient_name,
+        MenuIngredient.quantity,
+        MenuIngredient.unit
+    ).outerjoin(
+        MenuIngredient, MenuIngredient.menu_id == Menu.id
+    ).order_by(Menu.id, MenuIngredient.id)
+    
+    menus: Dict[int, Dict] = {}
+    for menu_id, menu_name, ingredient_name, quantity, unit in rows:
+        menu = menus.get(menu_id)
+        if menu is None:
+            menu = menus[menu_id] = {"id": menu_id, "name": menu_name, "ingredients": []}
+        if ingredient_name is not None:
+            menu["ingredients"].append({"ingredient_name": ingredient_name, "quantity": quantity, "unit": unit})
+    return list(menus.values())
+
@@ -1,123 +1,518 @@
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from app.models.inventory import InventoryItem
-from app.models.order import Order, OrderItem, OrderPriority
+import heapq
+import math
+import threading
+import numpy as np
+from sqlalchemy import case, func, insert, update
+from sqlalchemy.orm import Session, selectinload
+from datetime import date, datetime, timedelta
+from app.models.inventory import InventoryItem, InventoryMovement
+from app.models.order import Order, OrderItem, OrderPriority, OrderStatus
+from app.models.sales import IngredientUsageRollup
 from app.schemas.order import OrderCreate
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+from app.services import data_version, inventory_service
 
 
 
-def calculate_days_until_out_of_stock(current_stock: float, avg_daily: float) -> int:
-    if avg_daily <= 0:
-        return 999
-    return int(current_stock / avg_daily)
+def _average_daily_usage(
+    db: Session,
+    item_ids: np.ndarray,
+    today: date,
+    window_days: int,
+    half_life_days: Optional[float]
+) -> np.ndarray:
+    """최근 window_days 일 동안의 일별 재료 사용량 롤업으로 품목별 하루 평균 사용량을 구한다.
 
+    half_life_days 가 주어지면 오래된 날일수록 지수적으로 가중치를 줄인다.
+    """
+    start = datetime.combine(today - timedelta(days=window_days - 1), datetime.min.time())
+    rows = db.query(
+        IngredientUsageRollup.inventory_item_id,
+        func.date(IngredientUsageRollup.bucket_start),
+        func.sum(IngredientUsageRollup.amount)
+    ).filter(
+        IngredientUsageRollup.granularity == "day",
+        IngredientUsageRollup.bucket_start >= start
+    ).group_by(
+        IngredientUsageRollup.inventory_item_id,
+        func.date(IngredientUsageRollup.bucket_start)
+    ).all()
 
-def calculate_recommended_quantity(
-    current_stock: float,
-    min_stock: float,
-    avg_daily: float,
+    ages = np.arange(window_days, dtype=np.float64)
+    if half_life_days:
+        weights = 0.5 ** (ages / half_life_days)
+    else:
+        weights = np.ones(window_days)
+
+    usage = np.zeros(len(item_ids), dtype=np.float64)
+    if not rows:
+        return usage
+
+    row_items = np.array([row[0] for row in rows], dtype=np.int64)
+    row_ages = np.array([(today - date.fromisoformat(str(row[1]))).days for row in rows], dtype=np.int64)
+    row_amounts = np.array([row[2] for row in rows], dtype=np.float64)
+
+    positions = np.searchsorted(item_ids, row_items)
+    known = (positions < len(item_ids)) & (row_ages >= 0) & (row_ages < window_days)
+    known[known] &= item_ids[positions[known]] == row_items[known]
+    np.add.at(usage, positions[known], row_amounts[known] * weights[row_ages[known]])
+    return usage / weights.sum()
+
+
+_PRIORITIES = np.array([OrderPriority.HIGH, OrderPriority.MEDIUM, OrderPriority.LOW], dtype=object)
+_PRIORITY_CODES = {priority: code for code, priority in enumerate(_PRIORITIES)}
+
+_recommendation_lock = threading.Lock()
+# (재고 버전, 매출 버전, 날짜, 기간, 반감기) -> 추천 대상 품목의 계산 결과 배열
+_recommendation_cache: Dict[Tuple, Dict] = {}
+
+
+def _rank_recommendations(
+    db: Session,
+    today: date,
+    window_days: int,
+    half_life_days: Optional[float],
     days_buffer: int = 7
-) -> float:
-    needed_stock = min_stock + (avg_daily * days_buffer)
-    recommended = needed_stock - current_stock
-    return max(0, recommended)
+) -> Dict:
+    """발주가 필요한 품목과 그 추천 수치를 배열로 계산한다. 정렬은 요청마다 필요한 만큼만 한다."""
+    rows = db.query(
+        InventoryItem.id,
+        InventoryItem.name,
+        InventoryItem.unit,
+        InventoryItem.quantity,
+        InventoryItem.min_quantity,
+        InventoryItem.price
+    ).order_by(InventoryItem.id).all()
 
+    ids = np.array([row.id for row in rows], dtype=np.int64)
+    quantity = np.array([row.quantity for row in rows], dtype=np.float64)
+    min_quantity = np.array([row.min_quantity for row in rows], dtype=np.float64)
+    price = np.array([row.price for row in rows], dtype=np.float64)
+    avg_daily = _average_daily_usage(db, ids, today, window_days, half_life_days)
 
-def determine_priority(days_until_out: int) -> OrderPriority:
-    if days_until_out <= 2:
-        return OrderPriority.HIGH
-    elif days_until_out <= 5:
-        return OrderPriority.MEDIUM
-    else:
-        return OrderPriority.LOW
-
-    inventory_items = db.query(InventoryItem).all()
-    recommendations = []
-    
-    for item in inventory_items:
-        avg_daily = calculate_avg_daily_usage(item)
-        days_until_out = calculate_days_until_out_of_stock(item.quantity, avg_daily)
-        
-        if item.quantity <= item.min_quantity or days_until_out <= 7:
-            recommended_qty = calculate_recommended_quantity(
-                item.quantity,
-                item.min_quantity,
-                avg_daily
-            )
-            
-            if recommended_qty > 0:
-                priority = determine_priority(days_until_out)
-                estimated_cost = recommended_qty * item.price
-                
-                recommendations.append({
-                    "id": item.id,
-                    "name": item.name,
-                    "current_stock": item.quantity,
-                    "min_stock": item.min_quantity,
-                    "avg_daily": avg_daily,
-                    "recommended_qty": recommended_qty,
-                    "unit": item.unit,
-                    "priority": priority,
-                    "estimated_cost": estimated_cost,
-                    "days_until_out_of_stock": days_until_out
-                })
-    
-    priority_order = {"high": 0, "medium": 1, "low": 2}
-    recommendations.sort(key=lambda x: priority_order.get(x["priority"].value, 3))
-    
-    return recommendations
-
-
-def create_order(db: Session, order_data: OrderCreate):
-    order = Order(status="pending")
+    # 남은 일수 = 재고 / 하루 사용량 (사용 기록이 없으면 999), 추천 수량 = 최소 수량 + 확보 일수치 - 재고
+    days_until_out = np.full(len(ids), 999, dtype=np.int64)
+    using = avg_daily > 0
+    days_until_out[using] = (quantity[using] / avg_daily[using]).astype(np.int64)
+    recommended = np.maximum(0, min_quantity + avg_daily * days_buffer - quantity)
+    # 0: 높음(2일 이하), 1: 보통(5일 이하), 2: 낮음
+    priority = np.where(days_until_out <= 2, 0, np.where(days_until_out <= 5, 1, 2))
+
+    needed = ((quantity <= min_quantity) | (days_until_out <= days_buffer)) & (recommended > 0)
+    selected = np.flatnonzero(needed)
+    return {
+        "rows": [rows[i] for i in selected.tolist()],
+        "quantity": quantity[selected],
+        "min_quantity": min_quantity[selected],
+        "avg_daily": avg_daily[selected],
+        "recommended": recommended[selected],
+        "price": price[selected],
+        "priority": priority[selected],
+        "days_until_out": days_until_out[selected]
+    }
+
+
+def _top_recommendations(ranked: Dict, priority: Optional[OrderPriority], limit: Optional[int]) -> List[Dict]:
+    """우선순위, 그다음 재고 id 순으로 앞의 limit 개만 골라 응답 dict 로 만든다."""
+    # 후보는 재고 id 순이므로 (우선순위, 위치)를 정수 키 하나로 비교한다
+    positions = np.arange(len(ranked["rows"]), dtype=np.int64)
+    keys = ranked["priority"] * len(positions) + positions
+    if priority is not None:
+        keys = keys[ranked["priority"] == _PRIORITY_CODES[OrderPriority(priority)]]
+    if limit is not None and limit < len(keys):
+        keys = keys[np.argpartition(keys, limit - 1)[:limit]]
+    keys.sort()
+
+    result = []
+    for i in (keys % max(len(positions), 1)).tolist():
+        row = ranked["rows"][i]
+        result.append({
+            "id": row.id,
+            "name": row.name,
+            "current_stock": float(ranked["quantity"][i]),
+            "min_stock": float(ranked["min_quantity"][i]),
+            "avg_daily": float(ranked["avg_daily"][i]),
+            "recommended_qty": float(ranked["recommended"][i]),
+            "unit": row.unit,
+            "priority": _PRIORITIES[ranked["priority"][i]],
+            "estimated_cost": float(ranked["recommended"][i] * ranked["price"][i]),
+            "days_until_out_of_stock": int(ranked["days_until_out"][i])
+        })
+    return result
+
+
+# 우선순위별 확보 일수 가중치
+_PRIORITY_WEIGHTS = np.array([3.0, 2.0, 1.0])
+
+
+def optimize_order(
+    db: Session,
+    budget: float,
+    pack_sizes: Optional[Dict[int, float]] = None,
+    horizon_days: int = 7,
+    window_days: int = 14,
+    half_life_days: Optional[float] = None
+) -> Tuple[Optional[Dict], List[int]]:
+    """예산 안에서 우선순위가 높은 품목의 확보 일수가 최대가 되도록 발주 수량을 고른다.
+
+    pack_sizes(재고 id -> 포장 단위, 없으면 1)의 id 중 재고에 없는 것이 있으면 계산하지 않고
+    (None, 없는 id 목록)을 반환하며, 라우터는 이를 404 로 응답한다. 그 밖에는 (결과, [])를 반환한다.
+
+    품목별 가치는 우선순위 가중치 x log(1 + 확보 일수) 로 두어 한 품목에 예산이 몰리지
+    않게 하고, 힙에서 비용 대비 가치 증가가 가장 큰 품목부터 하루치(포장 단위로 올림)씩
+    추가한다. 목표 재고(최소 수량 + horizon_days 일치 사용량)를 넘게는 사지 않는다.
+    """
+    pack_sizes = pack_sizes or {}
+    rows = db.query(
+        InventoryItem.id,
+        InventoryItem.name,
+        InventoryItem.unit,
+        InventoryItem.quantity,
+        InventoryItem.min_quantity,
+        InventoryItem.price
+    ).order_by(InventoryItem.id).all()
+    missing_ids = sorted(set(pack_sizes) - {row.id for row in rows})
+    if missing_ids:
+        return None, missing_ids
+    result = {"order": {"items": []}, "lines": [], "total_cost": 0.0, "remaining_budget": budget}
+    if not rows:
+        return result, []
+    
+    ids = np.array([row.id for row in rows], dtype=np.int64)
+    quantity = np.maximum(np.array([row.quantity for row in rows], dtype=np.float64), 0)
+    min_quantity = np.array([row.min_quantity for row in rows], dtype=np.float64)
+    price = np.array([row.price for row in rows], dtype=np.float64)
+    pack = np.array([pack_sizes.get(int(item_id), 1.0) for item_id in ids], dtype=np.float64)
+    
+    avg_daily = _average_daily_usage(db, ids, date.today(), window_days, half_life_days)
+    # 사용 기록이 없는 품목은 품절 손실 추정과 같은 기본 사용량을 가정
+    avg_daily = np.where(avg_daily > 0, avg_daily, np.maximum(0.5, min_quantity / 30.0))
+    
+    days_until_out = (quantity / avg_daily).astype(np.int64)
+    priority = np.where(days_until_out <= 2, 0, np.where(days_until_out <= 5, 1, 2))
+    weight = _PRIORITY_WEIGHTS[priority]
+    target = min_quantity + avg_daily * horizon_days
+    max_packs = np.ceil(np.maximum(target - quantity, 0) / pack - 1e-9).astype(np.int64)
+    step_packs = np.maximum(1, np.ceil(avg_daily / pack)).astype(np.int64)
+    pack_cost = pack * price
+    
+    def coverage(i: int, packs: int) -> float:
+        return min(quantity[i] + packs * pack[i], target[i]) / avg_daily[i]
+    
+    def gain_per_cost(i: int, packs: int, step: int) -> float:
+        gain = weight[i] * (math.log1p(coverage(i, packs + step)) - math.log1p(coverage(i, packs)))
+        cost = step * pack_cost[i]
+        return math.inf if cost <= 0 else gain / cost
+    
+    bought = np.zeros(len(ids), dtype=np.int64)
+    heap = []
+    for i in np.flatnonzero(max_packs > 0).tolist():
+        step = int(min(step_packs[i], max_packs[i]))
+        heap.append((-gain_per_cost(i, 0, step), i, step))
+    heapq.heapify(heap)
+    
+    remaining = float(budget)
+    while heap:
+        _, i, step = heapq.heappop(heap)
+        affordable = step if pack_cost[i] <= 0 else min(step, int(remaining // pack_cost[i] + 1e-9))
+        if affordable <= 0:
+            continue
+        if affordable < step:
+            # 남은 예산으로 살 수 있는 만큼으로 줄여 다시 비교
+            heapq.heappush(heap, (-gain_per_cost(i, int(bought[i]), affordable), i, affordable))
+            continue
+        bought[i] += step
+        remaining -= step * pack_cost[i]
+        left = int(max_packs[i] - bought[i])
+        if left > 0:
+            next_step = int(min(step_packs[i], left))
+            heapq.heappush(heap, (-gain_per_cost(i, int(bought[i]), next_step), i, next_step))
+    
+    # 우선순위, 그다음 재고 id 순
+    selected = np.flatnonzero(bought > 0)
+    selected = selected[np.argsort(priority[selected], kind="stable")]
+    for i in selected.tolist():
+        line_priority = _PRIORITIES[priority[i]]
+        line_quantity = float(bought[i] * pack[i])
+        result["order"]["items"].append({
+            "inventory_item_id": int(ids[i]),
+            "quantity": line_quantity,
+            "priority": line_priority
+        })
+        result["lines"].append({
+            "inventory_item_id": int(ids[i]),
+            "name": rows[i].name,
+            "unit": rows[i].unit,
+            "priority": line_priority,
+            "pack_size": float(pack[i]),
+            "packs": int(bought[i]),
+            "quantity": line_quantity,
+            "cost": float(bought[i] * pack_cost[i]),
+            "coverage_days_before": float(quantity[i] / avg_daily[i]),
+            "coverage_days_after": float((quantity[i] + line_quantity) / avg_daily[i])
+        })
+    result["total_cost"] = float(budget - remaining)
+    result["remaining_budget"] = remaining
+    return result, []
+
+
+def get_order_recommendations(
+    db: Session,
+    window_days: int = 14,
+    half_life_days: Optional[float] = None,
+    limit: Optional[int] = None,
+    priority: Optional[OrderPriority] = None
+) -> List[Dict]:
+    """발주 추천 목록 (우선순위 순).
+
+    하루 평균 사용량은 최근 window_days 일의 실제 재료 사용량 롤업에서 구하며, 결과는
+    재고나 매출이 바뀔 때까지 캐시한다.
+    """
+    today = date.today()
+    key = (
+        *data_version.get_versions(db, data_version.INVENTORY, data_version.SALES).values(),
+        today,
+        window_days,
+        half_life_days
+    )
+    with _recommendation_lock:
+        ranked = _recommendation_cache.get(key)
+
+    if ranked is None:
+        ranked = _rank_recommendations(db, today, window_days, half_life_days)
+        with _recommendation_lock:
+            # 버전이 바뀐 오래된 결과는 버린다
+            for stale in [k for k in _recommendation_cache if k[:3] != key[:3]]:
+                del _recommendation_cache[stale]
+            _recommendation_cache[key] = ranked
+
+    return _top_recommendations(ranked, priority, limit)
+
+
+def create_order(db: Session, order_data: OrderCreate) -> Tuple[Optional[Dict], List[int]]:
+    """발주를 생성한다. 존재하지 않는 재고 id 가 있으면 아무것도 만들지 않고 (None, 없는 id 목록)을 반환한다."""
+    item_ids = {line.inventory_item_id for line in order_data.items}
+    inventory = {
+        row.id: row for row in db.query(
+            InventoryItem.id,
+            InventoryItem.name,
+            InventoryItem.unit,
+            InventoryItem.price
+        ).filter(InventoryItem.id.in_(item_ids))
+    }
+    missing_ids = sorted(item_ids - inventory.keys())
+    if missing_ids:
+        return None, missing_ids
+    
+    lines = []
+    for line in order_data.items:
+        unit_price = inventory[line.inventory_item_id].price
+        lines.append({
+            "inventory_item_id": line.inventory_item_id,
+            "quantity": line.quantity,
+            "unit_price": unit_price,
+            "total_price": line.quantity * unit_price,
+            "priority": OrderPriority(line.priority)
+        })
+    
+    order = Order(status=OrderStatus.PENDING, total_cost=sum(line["total_price"] for line in lines))
     db.add(order)
     db.flush()
     
-    total_cost = 0
-    order_items_data = []
+    for line in lines:
+        line["order_id"] = order.id
+    # 발주 항목은 다중 VALUES INSERT ... RETURNING 으로 한 번에 넣는다.
+    # id 는 VALUES 순서대로 증가하므로 id 로 정렬하면 요청한 항목 순서가 된다
+    # (항목이 없는 발주는 INSERT 없이 빈 발주로 만든다)
+    created = sorted(db.execute(
+        insert(OrderItem).returning(
+            OrderItem.id,
+            OrderItem.inventory_item_id,
+            OrderItem.quantity,
+            OrderItem.unit_price,
+            OrderItem.total_price,
+            OrderItem.priority
+        ),
+        lines
+    ).all(), key=lambda row: row.id) if lines else []
+    data_version.bump(db, data_version.ORDER)
+    db.commit()
+    db.refresh(order)
     
-    for item_data in order_data.items:
-        inventory_item = db.query(InventoryItem).filter(
-            InventoryItem.id == item_data.inventory_item_id
-        ).first()
-        
-        if not inventory_item:
-            continue
-        
-        unit_price = inventory_item.price
-        total_price = item_data.quantity * unit_price
-        total_cost += total_price
-        
-        order_item = OrderItem(
-            order_id=order.id,
-            inventory_item_id=inventory_item.id,
-            quantity=item_data.quantity,
-            unit_price=unit_price,
-            total_price=total_price,
-            priority=item_data.priority
-        )
-        db.add(order_item)
-        order_items_data.append({
+    return {
+        "id": order.id,
+        "status": order.status,
+        "total_cost": order.total_cost,
+        "items": [
+            {
+                "id": row.id,
+                "name": inventory[row.inventory_item_id].name,
+                "quantity": row.quantity,
+                "unit": inventory[row.inventory_item_id].unit,
+                "unit_price": row.unit_price,
+                "total_price": row.total_price,
+                "priority": row.priority
+            }
+            for row in created
+        ],
+        "created_at": order.created_at,
+        "updated_at": order.updated_at
+    }, []
+
+
+def _order_to_dict(order: Order) -> Dict:
+    items = []
+    for order_item in order.items:
+        # 발주 후 재고 품목이 삭제된 경우에도 발주 이력은 보여준다
+        inventory_item = order_item.inventory_item
+        items.append({
             "id": order_item.id,
-            "name": inventory_item.name,
+            "name": inventory_item.name if inventory_item else "(삭제된 품목)",
             "quantity": order_item.quantity,
-            "unit": inventory_item.unit,
+            "unit": inventory_item.unit if inventory_item else "-",
             "unit_price": order_item.unit_price,
             "total_price": order_item.total_price,
             "priority": order_item.priority
         })
-    
-    order.total_cost = total_cost
-    db.commit()
-    db.refresh(order)
-    
     return {
         "id": order.id,
         "status": order.status,
         "total_cost": order.total_cost,
-        "items": order_items_data,
+        "items": items,
         "created_at": order.created_at,
         "updated_at": order.updated_at
     }
 
+
+def _with_items(query):
+    # 발주 항목과 재고 품목을 각각 IN 쿼리 한 번으로 미리 불러온다 (N+1 방지)
+    return query.options(selectinload(Order.items).selectinload(OrderItem.inventory_item))
+
+
+def list_orders(
+    db: Session,
+    status: Optional[OrderStatus] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = 20
+) -> Tuple[List[Dict], Optional[int]]:
+    """최신 발주부터 id 역순 커서 페이지로 반환한다. 항목 수와 관계없이 쿼리 3번으로 끝난다."""
+    query = db.query(Order)
+    if status is not None:
+        query = query.filter(Order.status == status)
+    # created_at 은 SQLite 가 'YYYY-MM-DD HH:MM:SS' 로 저장하므로 바인딩 값도 datetime() 으로 같은 형식으로 맞춘다
+    if start is not None:
+        query = query.filter(Order.created_at >= func.datetime(start))
+    if end is not None:
+        query = query.filter(Order.created_at < func.datetime(end))
+    if cursor is not None:
+        query = query.filter(Order.id < cursor)
+    
+    orders = _with_items(query).order_by(Order.id.desc()).limit(limit).all()
+    next_cursor = orders[-1].id if len(orders) == limit else None
+    return [_order_to_dict(order) for order in orders], next_cursor
+
+
+def get_order(db: Session, order_id: int) -> Optional[Dict]:
+    order = _with_items(db.query(Order)).filter(Order.id == order_id).first()
+    if not order:
+        return None
+    return _order_to_dict(order)
+
+
+# 허용되는 발주 상태 변경 (현재 상태 -> 바꿀 수 있는 상태)
+ORDER_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.CONFIRMED, OrderStatus.CANCELLED},
+    OrderStatus.CONFIRMED: {OrderStatus.COMPLETED, OrderStatus.CANCELLED},
+    OrderStatus.COMPLETED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
+_STATUS_LABELS = {
+    OrderStatus.PENDING: "대기",
+    OrderStatus.CONFIRMED: "확정",
+    OrderStatus.COMPLETED: "입고 완료",
+    OrderStatus.CANCELLED: "취소",
+}
+
+
+def _receive_order_items(db: Session, order_id: int) -> List:
+    """발주 항목 수량을 재고에 더하고 입고 기록을 남긴다. 커밋은 호출자가 한다."""
+    received: Dict[int, float] = {}
+    for item_id, quantity in db.query(OrderItem.inventory_item_id, OrderItem.quantity).filter(
+        OrderItem.order_id == order_id
+    ):
+        received[item_id] = received.get(item_id, 0) + quantity
+    if not received:
+        return []
+    
+    # quantity = quantity + 입고량 을 DB 안에서 계산하는 단일 UPDATE (동시에 들어온 매출 차감과 충돌하지 않음)
+    rows = db.execute(
+        update(InventoryItem)
+        .where(InventoryItem.id.in_(received.keys()))
+        .values(
+            quantity=InventoryItem.quantity + case(received, value=InventoryItem.id),
+            last_updated=date.today()
+        )
+        .returning(
+            InventoryItem.id,
+            InventoryItem.name,
+            InventoryItem.unit,
+            InventoryItem.min_quantity,
+            InventoryItem.quantity
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    
+    if rows:
+        db.execute(insert(InventoryMovement), [
+            {
+                "inventory_item_id": row.id,
+                "order_id": order_id,
+                "change": received[row.id],
+                "quantity_after": row.quantity,
+                "reason": "order_received"
+            }
+            for row in rows
+        ])
+    return [
+        inventory_service.StockChange(
+            row.id, row.name, row.unit, row.min_quantity, row.quantity - received[row.id], row.quantity
+        )
+        for row in rows
+    ]
+
+
+def update_order_status(db: Session, order_id: int, status: OrderStatus) -> Tuple[Optional[Dict], Optional[str]]:
+    """발주 상태를 바꾼다. 입고 완료(completed)로 바꾸면 모든 항목 수량을 한 트랜잭션에서 재고에 더한다.
+
+    (발주, None) / 없는 발주면 (None, None) / 허용되지 않는 변경이면 (None, 오류 메시지)를 반환한다.
+    """
+    status = OrderStatus(status)
+    current = db.query(Order.status).filter(Order.id == order_id).scalar()
+    if current is None:
+        return None, None
+    if status not in ORDER_TRANSITIONS[current]:
+        return None, f"'{_STATUS_LABELS[current]}' 상태의 발주는 '{_STATUS_LABELS[status]}' 상태로 바꿀 수 없습니다."
+    
+    # 같은 발주를 동시에 처리해도 한 번만 반영되도록 현재 상태를 조건으로 건다
+    changed = db.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.status == current)
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not changed:
+        db.rollback()
+        return None, "다른 요청이 먼저 발주 상태를 변경했습니다. 다시 조회한 뒤 시도하세요."
+    
+    stock_changes = _receive_order_items(db, order_id) if status == OrderStatus.COMPLETED else []
+    data_version.bump(db, data_version.ORDER, *([data_version.INVENTORY] if stock_changes else []))
+    db.commit()
+    inventory_service.publish_stock_changes(stock_changes)
+    if stock_changes:
+        print(f"발주 {order_id} 입고 완료: {len(stock_changes)}개 품목 재고 반영")
+    
+    db.expire_all()
+    return get_order(db, order_id), None
@@ -0,0 +1,98 @@
+from typing import Dict, Iterable, List
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models.inventory import InventoryItem
+from app.services import availability_service, inventory_service
+
+
+HOURS_PER_DAY = 24
+
+
+def project_stock(db: Session, planned_sales: Iterable) -> Dict:
+    """예정 매출(메뉴, 수량, 시간대)을 레시피 행렬에 곱해 재고 소진 시점과 부족량을 계산한다.
+
+    시간대(hour)가 하나라도 있으면 0~23시 단위로, 없으면 하루 전체를 한 구간으로 본다.
+    시간대가 없는 항목은 가장 이른 구간(0시)에 판매되는 것으로 계산한다.
+    """
+    matrix, stock = availability_service.get_stock(db)
+    planned_sales = list(planned_sales)
+
+    unknown_menus: List[str] = []
+    positions, hours, quantities = [], [], []
+    for sale in planned_sales:
+        position = matrix.menu_positions.get(sale.menu_name)
+        if position is None:
+            if sale.menu_name not in unknown_menus:
+                unknown_menus.append(sale.menu_name)
+            continue
+        positions.append(position)
+        hours.append(sale.hour or 0)
+        quantities.append(sale.quantity)
+
+    hourly = any(sale.hour is not None for sale in planned_sales)
+    bucket_count = HOURS_PER_DAY if hourly else 1
+    item_count = len(matrix.item_ids)
+    result = {"hourly": hourly, "items": [], "unknown_menus": unknown_menus}
+    if not positions or item_count == 0:
+        return result
+
+    positions = np.array(positions, dtype=np.int64)
+    hours = np.array(hours, dtype=np.int64) if hourly else np.zeros(len(positions), dtype=np.int64)
+    quantities = np.array(quantities, dtype=np.float64)
+
+    # 예정 판매마다 해당 메뉴 행의 레시피 원소들을 펼친다 (COO 행 구간)
+    bounds = np.searchsorted(matrix.rows, np.arange(len(matrix.menu_ids) + 1))
+    starts = bounds[positions]
+    counts = bounds[positions + 1] - starts
+    sale_index = np.repeat(np.arange(len(positions)), counts)
+    entry_index = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(starts, counts)
+
+    # 시간대 x 재고 품목 사용량
+    usage = np.bincount(
+        hours[sale_index] * item_count + matrix.cols[entry_index],
+        weights=quantities[sale_index] * matrix.vals[entry_index],
+        minlength=bucket_count * item_count
+    ).reshape(bucket_count, item_count)
+    cumulative = np.cumsum(usage, axis=0)
+    total_usage = cumulative[-1]
+
+    used = np.flatnonzero(total_usage > 0)
+    remaining = stock[used] - total_usage[used]
+    # 부동소수 오차로 남은 아주 작은 양은 0 으로 본다 (projected_status 와 stockout 이 어긋나지 않게)
+    remaining[np.abs(remaining) <= 1e-9] = 0.0
+    shortfall = np.maximum(-remaining, 0.0)
+    # 재고를 정확히 다 쓴 시점(남은 양 0, 품절 상태)도 품절로 본다
+    exceeded = (cumulative[:, used] >= stock[used] - 1e-9) & (cumulative[:, used] > 0)
+    stockout_bucket = np.where(exceeded.any(axis=0), exceeded.argmax(axis=0), -1)
+
+    min_quantities = dict(db.query(InventoryItem.id, InventoryItem.min_quantity).filter(
+        InventoryItem.id.in_(matrix.item_ids[used].tolist())
+    ).all())
+
+    items = []
+    for k, column in enumerate(used.tolist()):
+        item_id = int(matrix.item_ids[column])
+        projected = max(float(remaining[k]), 0.0)
+        min_quantity = min_quantities.get(item_id, 0.0)
+        bucket = int(stockout_bucket[k])
+        items.append({
+            "item_id": item_id,
+            "name": matrix.item_names[column],
+            "current_quantity": float(stock[column]),
+            "planned_usage": float(total_usage[column]),
+            "projected_quantity": projected,
+            "shortfall": float(shortfall[k]),
+            "stockout": bucket >= 0,
+            "stockout_hour": bucket if hourly and bucket >= 0 else None,
+            "projected_status": inventory_service.get_stock_status(projected, min_quantity)
+        })
+
+    # 먼저 떨어지는 품목, 부족량이 큰 품목 순
+    items.sort(key=lambda item: (
+        not item["stockout"],
+        item["stockout_hour"] or 0,
+        -item["shortfall"],
+        item["item_id"]
+    ))
+    result["items"] = items
+    return result
@@ -0,0 +1,99 @@
+import threading
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.inventory import InventoryItem
+from app.models.menu import Menu, MenuIngredient
+from app.services import data_version
+
+
+class CompiledRecipe(NamedTuple):
+    menu_id: int
+    # (inventory_item_id, 1인분 사용량) — 재고에 없는 재료는 inventory_item_id 가 None
+    ingredients: Tuple[Tuple[Optional[int], float], ...]
+    ingredient_names: Tuple[str, ...]
+
+
+_lock = threading.Lock()
+_recipes: Dict[str, CompiledRecipe] = {}
+# 캐시가 따르는 data_version.CATALOG 버전 (모든 워커가 공유)
+_generation = -1
+_hits = 0
+_misses = 0
+
+
+def _compile(db: Session, menu_names: Iterable[str]) -> Dict[str, CompiledRecipe]:
+    rows = db.query(
+        Menu.id,
+        Menu.name,
+        MenuIngredient.ingredient_name,
+        MenuIngredient.quantity
+    ).join(
+        MenuIngredient, MenuIngredient.menu_id == Menu.id
+    ).filter(
+        Menu.name.in_(list(menu_names))
+    ).order_by(MenuIngredient.id).all()
+
+    if not rows:
+        return {}
+
+    ingredient_names = {row.ingredient_name.strip() for row in rows}
+    item_ids: Dict[str, int] = {}
+    for item_id, name in db.query(InventoryItem.id, InventoryItem.name).filter(
+        InventoryItem.name.in_(ingredient_names)
+    ).order_by(InventoryItem.id):
+        item_ids.setdefault(name, item_id)
+
+    grouped: Dict[str, Tuple[int, list, list]] = {}
+    for menu_id, menu_name, ingredient_name, quantity in rows:
+        _, pairs, names = grouped.setdefault(menu_name, (menu_id, [], []))
+        pairs.append((item_ids.get(ingredient_name.strip()), quantity))
+        names.append(ingredient_name)
+
+    return {
+        menu_name: CompiledRecipe(menu_id, tuple(pairs), tuple(names))
+        for menu_name, (menu_id, pairs, names) in grouped.items()
+    }
+
+
+def get_recipes(db: Session, menu_names: Iterable[str]) -> Dict[str, CompiledRecipe]:
+    """메뉴 이름별 컴파일된 레시피를 반환한다. 캐시에 없는 메뉴만 한 번에 조회한다.
+
+    캐시는 DB 의 CATALOG 버전을 따르므로, 다른 워커가 CSV 초기화 등으로 재고 id 를
+    바꿨다면 이전 레시피는 버리고 다시 컴파일한다.
+    """
+    global _hits, _misses, _generation
+    menu_names = set(menu_names)
+    version = data_version.get(db, data_version.CATALOG)
+
+    with _lock:
+        # 더 늦게 버전을 읽은 요청이 캐시를 예전 버전으로 되돌리지 않도록 새 버전에서만 비운다
+        if version > _generation:
+            _recipes.clear()
+            _generation = version
+        found = {name: _recipes[name] for name in menu_names if name in _recipes}
+        missing = menu_names - found.keys()
+        _hits += len(found)
+        _misses += len(missing)
+        generation = _generation
+
+    if missing:
+        compiled = _compile(db, missing)
+        with _lock:
+            # 조회 도중 다른 요청이 더 새 버전으로 캐시를 비웠다면 넣지 않는다
+            if generation == _generation:
+                _recipes.update(compiled)
+        found.update(compiled)
+
+    return found
+
+
+def get_stats() -> Dict:
+    with _lock:
+        total = _hits + _misses
+        return {
+            "size": len(_recipes),
+            "hits": _hits,
+            "misses": _misses,
+            "hit_rate": round(_hits / total, 4) if total else 0.0,
+            "generation": _generation
+        }
@@ -0,0 +1,104 @@
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models.inventory import InventoryItem
+from app.models.menu import Menu, MenuIngredient
+from app.services import data_version
+
+
+class RecipeMatrix(NamedTuple):
+    """메뉴 x 재고 품목 레시피 행렬 (COO 희소 형식, rows 기준 정렬)"""
+    generation: int
+    menu_ids: np.ndarray
+    menu_names: List[str]
+    # 메뉴 이름 -> 행 번호
+    menu_positions: Dict[str, int]
+    item_ids: np.ndarray
+    item_names: List[str]
+    # 1인분에 필요한 재고 품목 수량: matrix[rows[k], cols[k]] = vals[k]
+    rows: np.ndarray
+    cols: np.ndarray
+    vals: np.ndarray
+    # rows 에서 각 메뉴 행이 시작하는 위치 (재료가 있는 메뉴만)
+    row_starts: np.ndarray
+    # 재고에 등록되지 않은 재료 (메뉴 행 번호 -> 재료 이름들)
+    unregistered: Dict[int, List[str]]
+
+    def menu_position(self, menu_id: int) -> Optional[int]:
+        position = int(np.searchsorted(self.menu_ids, menu_id))
+        if position < len(self.menu_ids) and self.menu_ids[position] == menu_id:
+            return position
+        return None
+
+
+_lock = threading.Lock()
+_matrix: Optional[RecipeMatrix] = None
+
+
+def _build(db: Session, generation: int) -> RecipeMatrix:
+    rows = db.query(
+        Menu.id,
+        Menu.name,
+        MenuIngredient.ingredient_name,
+        MenuIngredient.quantity
+    ).outerjoin(
+        MenuIngredient, MenuIngredient.menu_id == Menu.id
+    ).order_by(Menu.id, MenuIngredient.id).all()
+
+    # 재료 이름은 판매 차감과 같은 규칙으로 매칭 (앞뒤 공백 제거, 같은 이름이면 id 가 작은 품목)
+    item_ids: Dict[str, int] = {}
+    for item_id, name in db.query(InventoryItem.id, InventoryItem.name).order_by(InventoryItem.id):
+        item_ids.setdefault(name, item_id)
+    columns = {item_id: position for position, item_id in enumerate(sorted(set(item_ids.values())))}
+    item_names = {item_id: name for name, item_id in item_ids.items()}
+
+    menu_ids: List[int] = []
+    menu_names: List[str] = []
+    unregistered: Dict[int, List[str]] = {}
+    entries: Dict[Tuple[int, int], float] = {}
+    for menu_id, menu_name, ingredient_name, quantity in rows:
+        if not menu_ids or menu_ids[-1] != menu_id:
+            menu_ids.append(menu_id)
+            menu_names.append(menu_name)
+        if ingredient_name is None:
+            continue
+        row = len(menu_ids) - 1
+        item_id = item_ids.get(ingredient_name.strip())
+        if item_id is None:
+            unregistered.setdefault(row, []).append(ingredient_name.strip())
+        elif quantity and quantity > 0:
+            key = (row, columns[item_id])
+            entries[key] = entries.get(key, 0.0) + quantity
+
+    coords = np.array(list(entries.keys()), dtype=np.int64).reshape(-1, 2)
+    matrix_rows = coords[:, 0]
+    return RecipeMatrix(
+        generation=generation,
+        menu_ids=np.array(menu_ids, dtype=np.int64),
+        menu_names=menu_names,
+        menu_positions={name: position for position, name in reversed(list(enumerate(menu_names)))},
+        item_ids=np.array(list(columns.keys()), dtype=np.int64),
+        item_names=[item_names[item_id] for item_id in columns],
+        rows=matrix_rows,
+        cols=coords[:, 1],
+        vals=np.array(list(entries.values()), dtype=np.float64),
+        row_starts=np.flatnonzero(np.r_[True, matrix_rows[1:] != matrix_rows[:-1]]) if len(matrix_rows) else matrix_rows,
+        unregistered=unregistered
+    )
+
+
+def get_matrix(db: Session) -> RecipeMatrix:
+    """현재 레시피 행렬을 반환한다. CATALOG 버전(CSV 업로드, 재고 품목 추가/삭제/이름/단가 변경)이 바뀌면 다시 만든다."""
+    global _matrix
+    generation = data_version.get(db, data_version.CATALOG)
+    with _lock:
+        if _matrix is not None and _matrix.generation == generation:
+            return _matrix
+
+    # 버전을 먼저 읽었으므로 만든 행렬이 이 버전보다 오래된 데이터일 수는 없다
+    matrix = _build(db, generation)
+    with _lock:
+        if _matrix is None or _matrix.generation <= generation:
+            _matrix = matrix
+    return matrix
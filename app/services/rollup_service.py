@@ -0,0 +1,150 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.sales import SalesEvent, MenuSalesRollup, IngredientUsageRollup
+from app.services import data_version
+
+
+GRANULARITIES = ("hour", "day")
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _upsert(db: Session, model):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
+def _aggregate(events: Iterable[Dict]) -> Tuple[Dict, Dict]:
+    menus: Dict[Tuple[str, datetime, int], Dict] = {}
+    ingredients: Dict[Tuple[str, datetime, int], float] = {}
+    for event in events:
+        for granularity in GRANULARITIES:
+            bucket = bucket_start(event["sold_at"], granularity)
+            row = menus.setdefault((granularity, bucket, event["menu_id"]), {
+                "granularity": granularity,
+                "bucket_start": bucket,
+                "menu_id": event["menu_id"],
+                "menu_name": event["menu_name"],
+                "quantity": 0,
+                "sales_count": 0
+            })
+            row["quantity"] += event["quantity"]
+            row["sales_count"] += 1
+            for item_id, amount in event["deductions"]:
+                key = (granularity, bucket, item_id)
+                ingredients[key] = ingredients.get(key, 0) + amount
+    return menus, ingredients
+
+
+def apply_increments(db: Session, events: List[Dict]):
+    """sales_events 에 기록할 행들로 롤업 테이블을 upsert 누적한다. 커밋은 호출자가 한다."""
+    menus, ingredients = _aggregate(events)
+
+    if menus:
+        stmt = _upsert(db, MenuSalesRollup)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["granularity", "bucket_start", "menu_id"],
+                set_={
+                    "menu_name": stmt.excluded.menu_name,
+                    "quantity": MenuSalesRollup.quantity + stmt.excluded.quantity,
+                    "sales_count": MenuSalesRollup.sales_count + stmt.excluded.sales_count
+                }
+            ),
+            list(menus.values())
+        )
+
+    if ingredients:
+        stmt = _upsert(db, IngredientUsageRollup)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["granularity", "bucket_start", "inventory_item_id"],
+                set_={"amount": IngredientUsageRollup.amount + stmt.excluded.amount}
+            ),
+            [
+                {"granularity": granularity, "bucket_start": bucket, "inventory_item_id": item_id, "amount": amount}
+                for (granularity, bucket, item_id), amount in ingredients.items()
+            ]
+        )
+
+
+def rebuild(db: Session, chunk_size: int = 5000) -> Dict:
+    """롤업을 비우고 sales_events 원본에서 id 순으로 chunk_size 건씩 다시 계산한다."""
+    db.query(MenuSalesRollup).delete()
+    db.query(IngredientUsageRollup).delete()
+    # 재계산 중 새로 들어온 매출은 실시간 누적으로 반영되므로 시작 시점의 마지막 id 까지만 다시 센다
+    max_id = db.query(func.max(SalesEvent.id)).scalar() or 0
+    data_version.bump(db, data_version.SALES)
+    db.commit()
+
+    last_id = 0
+    processed = 0
+    chunks = 0
+    while last_id < max_id:
+        rows = db.query(
+            SalesEvent.id,
+            SalesEvent.menu_id,
+            SalesEvent.menu_name,
+            SalesEvent.quantity,
+            SalesEvent.sold_at,
+            SalesEvent.deductions
+        ).filter(
+            SalesEvent.id > last_id,
+            SalesEvent.id <= max_id
+        ).order_by(SalesEvent.id).limit(chunk_size).all()
+        if not rows:
+            break
+
+        apply_increments(db, [row._asdict() for row in rows])
+        data_version.bump(db, data_version.SALES)
+        db.commit()
+        last_id = rows[-1].id
+        processed += len(rows)
+        chunks += 1
+        print(f"롤업 재계산 진행: {processed}건 (마지막 id={last_id})")
+
+    return {"events_processed": processed, "chunks": chunks, "last_event_id": last_id}
+
+
+def get_menu_rollups(
+    db: Session,
+    granularity: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    menu_id: Optional[int] = None
+) -> List[MenuSalesRollup]:
+    query = db.query(MenuSalesRollup).filter(MenuSalesRollup.granularity == granularity)
+    if start:
+        query = query.filter(MenuSalesRollup.bucket_start >= start)
+    if end:
+        query = query.filter(MenuSalesRollup.bucket_start < end)
+    if menu_id is not None:
+        query = query.filter(MenuSalesRollup.menu_id == menu_id)
+    return query.order_by(MenuSalesRollup.bucket_start, MenuSalesRollup.menu_id).all()
+
+
+def get_ingredient_rollups(
+    db: Session,
+    granularity: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    inventory_item_id: Optional[int] = None
+) -> List[IngredientUsageRollup]:
+    query = db.query(IngredientUsageRollup).filter(IngredientUsageRollup.granularity == granularity)
+    if start:
+        query = query.filter(IngredientUsageRollup.bucket_start >= start)
+    if end:
+        query = query.filter(IngredientUsageRollup.bucket_start < end)
+    if inventory_item_id is not None:
+        query = query.filter(IngredientUsageRollup.inventory_item_id == inventory_item_id)
+    return query.order_by(IngredientUsageRollup.bucket_start, IngredientUsageRollup.inventory_item_id).all()
+
@@ -0,0 +1,222 @@
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.config import settings
+from app.database import SessionLocal
+from app.services import sales_service, idempotency_service
+
+
+_queue: "queue.Queue" = queue.Queue(maxsize=settings.SALES_QUEUE_MAXSIZE)
+_lock = threading.Lock()
+_batches: "OrderedDict[str, Dict]" = OrderedDict()
+# 대기/처리 중인 배치의 멱등성 키 -> batch_id
+_pending_keys: Dict[str, str] = {}
+_worker: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+_metrics = {
+    "enqueued_batches": 0,
+    "rejected_batches": 0,
+    "processed_batches": 0,
+    "failed_batches": 0,
+    "processed_sales": 0,
+    "transactions": 0,
+    "last_drain_lag_ms": 0.0,
+    "max_drain_lag_ms": 0.0,
+    "total_drain_lag_ms": 0.0,
+}
+
+
+def _ensure_worker():
+    global _worker
+    with _lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        _stop.clear()
+        _worker = threading.Thread(target=_run, name="sales-ingest-worker", daemon=True)
+        _worker.start()
+
+
+def _remember(batch_id: str, record: Dict):
+    with _lock:
+        _batches[batch_id] = record
+        while len(_batches) > settings.SALES_BATCH_STATUS_RETENTION:
+            _batches.popitem(last=False)
+
+
+def _update(batch_id: str, **fields):
+    with _lock:
+        record = _batches.get(batch_id)
+        if record is not None:
+            record.update(fields)
+
+
+def enqueue(sales: List, idempotency_key: Optional[str] = None) -> Optional[Dict]:
+    """매출 배치를 큐에 넣고 배치 상태를 반환한다. 큐가 가득 차면 None 을 반환한다.
+
+    같은 멱등성 키의 배치가 아직 대기/처리 중이면 새로 넣지 않고 기존 배치를 알려준다.
+    """
+    _ensure_worker()
+    if idempotency_key:
+        with _lock:
+            pending_id = _pending_keys.get(idempotency_key)
+            if pending_id is not None and pending_id in _batches:
+                return {
+                    "batch_id": pending_id,
+                    "status": _batches[pending_id]["status"],
+                    "queue_depth": _queue.qsize()
+                }
+            _pending_keys[idempotency_key] = batch_id = uuid.uuid4().hex
+    else:
+        batch_id = uuid.uuid4().hex
+    record = {
+        "batch_id": batch_id,
+        "status": "queued",
+        "sales_count": len(sales),
+        "enqueued_at": datetime.now(),
+        "completed_at": None,
+        "results": None,
+        "error": None,
+    }
+    _remember(batch_id, record)
+    try:
+        _queue.put_nowait((batch_id, sales, time.monotonic(), idempotency_key))
+    except queue.Full:
+        with _lock:
+            _batches.pop(batch_id, None)
+            _pending_keys.pop(idempotency_key, None)
+            _metrics["rejected_batches"] += 1
+        return None
+
+    with _lock:
+        _metrics["enqueued_batches"] += 1
+    return {"batch_id": batch_id, "status": "queued", "queue_depth": _queue.qsize()}
+
+
+def get_batch(batch_id: str) -> Optional[Dict]:
+    with _lock:
+        record = _batches.get(batch_id)
+        return dict(record) if record is not None else None
+
+
+def _run():
+    while not (_stop.is_set() and _queue.empty()):
+        try:
+            first = _queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+
+        # 연속으로 쌓인 배치를 하나의 트랜잭션으로 합쳐 처리
+        merged = [first]
+        while len(merged) < settings.SALES_QUEUE_MERGE_MAX:
+            try:
+                merged.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        _process(merged)
+        for _ in merged:
+            _queue.task_done()
+
+
+def _apply(merged: List) -> Optional[List[Dict]]:
+    db = SessionLocal()
+    try:
+        combined = [sale for _, sales, _, _ in merged for sale in sales]
+        batch_keys = [(key, len(sales)) for _, sales, _, key in merged]
+        return sales_service.apply_sales(db, combined, batch_keys=batch_keys)
+    except Exception as e:
+        db.rollback()
+        print(f"비동기 매출 반영 오류 ({len(merged)}개 배치): {e}")
+        return None
+    finally:
+        db.close()
+
+
+def _stored_results(key: Optional[str]) -> Optional[List[Dict]]:
+    if not key:
+        return None
+    db = SessionLocal()
+    try:
+        stored = idempotency_service.lookup(db, idempotency_service.batch_key(key))
+    finally:
+        db.close()
+    return stored["results"] if stored is not None else None
+
+
+def _finish(batch_id: str, key: Optional[str], **fields):
+    _update(batch_id, completed_at=datetime.now(), **fields)
+    if key:
+        with _lock:
+            _pending_keys.pop(key, None)
+
+
+def _process(merged: List):
+    for batch_id, _, _, _ in merged:
+        _update(batch_id, status="processing")
+
+    if len(merged) == 1:
+        batch_id, _, _, key = merged[0]
+        stored = _stored_results(key)
+        if stored is not None:
+            _finish(batch_id, key, status="completed", results=stored)
+            return
+
+    results = _apply(merged)
+    if results is None:
+        if len(merged) > 1:
+            # 병합 트랜잭션이 실패하면 배치별로 다시 시도해 실패 범위를 좁힌다
+            for batch in merged:
+                _process([batch])
+            return
+        batch_id, _, _, key = merged[0]
+        _finish(batch_id, key, status="failed", error="매출 반영 중 오류가 발생했습니다")
+        with _lock:
+            _metrics["failed_batches"] += 1
+        return
+
+    now = time.monotonic()
+    offset = 0
+    with _lock:
+        _metrics["transactions"] += 1
+    for batch_id, sales, enqueued_at, key in merged:
+        batch_results = results[offset:offset + len(sales)]
+        offset += len(sales)
+        _finish(batch_id, key, status="completed", results=batch_results)
+
+        lag_ms = (now - enqueued_at) * 1000
+        with _lock:
+            _metrics["processed_batches"] += 1
+            _metrics["processed_sales"] += len(sales)
+            _metrics["last_drain_lag_ms"] = lag_ms
+            _metrics["max_drain_lag_ms"] = max(_metrics["max_drain_lag_ms"], lag_ms)
+            _metrics["total_drain_lag_ms"] += lag_ms
+
+
+def get_metrics() -> Dict:
+    with _queue.mutex:
+        oldest = _queue.queue[0][2] if _queue.queue else None
+    with _lock:
+        metrics = dict(_metrics)
+        processed = metrics.pop("processed_batches")
+        total_lag = metrics.pop("total_drain_lag_ms")
+        return {
+            "queue_depth": _queue.qsize(),
+            "queue_capacity": settings.SALES_QUEUE_MAXSIZE,
+            "oldest_queued_age_ms": round((time.monotonic() - oldest) * 1000, 3) if oldest is not None else 0.0,
+            "processed_batches": processed,
+            **{key: round(value, 3) if isinstance(value, float) else value for key, value in metrics.items()},
+            "avg_drain_lag_ms": round(total_lag / processed, 3) if processed else 0.0,
+            "worker_alive": _worker is not None and _worker.is_alive(),
+        }
+
+
+def shutdown(timeout: float = 10.0):
+    """남은 배치를 모두 반영한 뒤 워커를 종료한다."""
+    _stop.set()
+    if _worker is not None:
+        _worker.join(timeout=timeout)
@@ -0,0 +1,231 @@
+from datetime import date, datetime
+from typing import List, Dict, Iterable, Optional, Sequence, Tuple
+from sqlalchemy import case, insert, update
+from sqlalchemy.orm import Session
+from app.models.inventory import InventoryItem
+from app.models.sales import SalesEvent
+from app.services import inventory_service, recipe_cache, idempotency_service, rollup_service, data_version
+
+
+def _deduct_atomically(db: Session, totals: Dict[int, float]) -> Dict[int, Dict]:
+    """품목별 합산 차감량을 단일 UPDATE 로 반영하고 차감 전 수량을 돌려준다.
+
+    quantity = CASE WHEN quantity - 차감량 < 0 THEN 0 ELSE quantity - 차감량 END 를 DB 안에서
+    계산하므로 여러 워커가 동시에 같은 품목을 차감해도 갱신이 유실되지 않고, 음수 재고가
+    잠깐이라도 보이지 않는다. 0 으로 맞춰진 행은 RETURNING 값으로 차감 전 수량을 알 수 없으므로,
+    먼저 같은 값을 다시 쓰는 UPDATE ... RETURNING 으로 행을 잠그고(SQLite 는 쓰기 잠금,
+    PostgreSQL 은 행 잠금) 커밋 전까지 바뀌지 않는 차감 전 수량을 읽는다.
+    """
+    rows = db.execute(
+        update(InventoryItem)
+        .where(InventoryItem.id.in_(totals.keys()))
+        .values(quantity=InventoryItem.quantity, updated_at=InventoryItem.updated_at)
+        .returning(
+            InventoryItem.id,
+            InventoryItem.name,
+            InventoryItem.quantity,
+            InventoryItem.min_quantity,
+            InventoryItem.unit
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    deduction = case(totals, value=InventoryItem.id)
+    db.execute(
+        update(InventoryItem)
+        .where(InventoryItem.id.in_(totals.keys()))
+        .values(
+            quantity=case(
+                (InventoryItem.quantity - deduction < 0, 0),
+                else_=InventoryItem.quantity - deduction
+            ),
+            last_updated=date.today()
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    return {
+        item_id: {
+            "id": item_id,
+            "name": name,
+            "quantity": float(quantity),
+            "min_quantity": min_quantity,
+            "unit": unit
+        }
+        for item_id, name, quantity, min_quantity, unit in rows
+    }
+
+
+def _parse_timestamp(value: str) -> datetime:
+    try:
+        sold_at = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.now()
+    if sold_at.tzinfo is not None:
+        sold_at = sold_at.astimezone().replace(tzinfo=None)
+    return sold_at
+
+
+def _status_warning(item: Dict, status: str, new_quantity: float):
+    if status == "품절":
+        return f"{item['name']} 재고가 품절되었습니다!"
+    if status == "부족":
+        return f"{item['name']} 재고가 부족합니다! (현재: {new_quantity}{item['unit']}, 최소: {item['min_quantity']}{item['unit']})"
+    return None
+
+
+def apply_sales(
+    db: Session,
+    sales: Iterable,
+    batch_keys: Sequence[Tuple[Optional[str], int]] = (),
+    deduct: bool = True
+) -> List[Dict]:
+    """매출 배치를 한 번에 재고에 반영한다.
+
+    레시피는 recipe_cache 에서 가져오고, 차감량은 품목별로 합산해 _deduct_atomically 의
+    원자적 UPDATE 로, 판매 이력은 sales_events 에 executemany INSERT 로 기록하고
+    시간/일 단위 롤업도 누적하며 모두 한 번의 커밋으로 적용한다. 판매별 결과(deducted_items, 상태 변경 경고)는
+    UPDATE 가 돌려준 차감 전 수량에서 출발해 배치 안의 순서대로 계산한다.
+
+    판매 건의 idempotency_key 가 이미 처리된 키라면 재고를 건드리지 않고 원래 결과를
+    돌려준다. batch_keys 는 (배치 멱등성 키, 판매 건수) 목록으로, 주어지면 결과를
+    배치 단위로 잘라 같은 트랜잭션에 함께 저장한다.
+
+    deduct=False 이면 재고는 그대로 두고 매출 이력만 기록한다 (과거 매출 적재용).
+    """
+    sales = list(sales)
+    if not sales:
+        return []
+
+    line_keys = {
+        idempotency_service.sale_key(sale.idempotency_key)
+        for sale in sales
+        if getattr(sale, "idempotency_key", None)
+    }
+    seen = idempotency_service.lookup_many(db, line_keys)
+    responses: Dict[str, Dict] = {}
+
+    recipes = recipe_cache.get_recipes(db, {sale.menu_name for sale in sales})
+
+    # 1단계: 중복 판매 건을 가려내고 품목별 차감량을 합산
+    plan = []
+    claimed = set()
+    totals: Dict[int, float] = {}
+    for sale in sales:
+        key = None
+        if getattr(sale, "idempotency_key", None):
+            key = idempotency_service.sale_key(sale.idempotency_key)
+            if key in seen or key in claimed:
+                plan.append((sale, key, True))
+                continue
+        recipe = recipes.get(sale.menu_name)
+        if recipe:
+            if key:
+                claimed.add(key)
+            for item_id, per_unit in recipe.ingredients:
+                if item_id is not None:
+                    totals[item_id] = totals.get(item_id, 0) + per_unit * sale.quantity
+        plan.append((sale, key, False))
+
+    inventory = _deduct_atomically(db, totals) if deduct and totals else {}
+    starting_quantities = {item_id: item["quantity"] for item_id, item in inventory.items()}
+
+    # 2단계: 차감 전 수량에서 출발해 판매별 결과를 순서대로 계산
+    results = []
+    events = []
+
+    for sale, key, duplicate in plan:
+        if duplicate:
+            results.append({**(seen.get(key) or responses[key]), "duplicate": True})
+            continue
+
+        recipe = recipes.get(sale.menu_name)
+        if not recipe:
+            results.append({
+                "menu_name": sale.menu_name,
+                "status": "error",
+                "message": f"메뉴 '{sale.menu_name}'를 찾을 수 없습니다"
+            })
+            continue
+
+        deducted_items = []
+        deductions = []
+        for (item_id, per_unit), ingredient_name in zip(recipe.ingredients, recipe.ingredient_names):
+            total_deduct = per_unit * sale.quantity
+            if not deduct and item_id is not None:
+                deductions.append([item_id, total_deduct])
+                deducted_items.append({"ingredient": ingredient_name, "deducted": total_deduct})
+                continue
+
+            item = inventory.get(item_id)
+            if item:
+                old_quantity = item["quantity"]
+                new_quantity = max(0, old_quantity - total_deduct)
+                item["quantity"] = new_quantity
+                deductions.append([item_id, total_deduct])
+
+                status = inventory_service.get_stock_status(new_quantity, item["min_quantity"])
+                old_status = inventory_service.get_stock_status(old_quantity, item["min_quantity"])
+                status_changed = status != old_status
+
+                deducted_items.append({
+                    "ingredient": ingredient_name,
+                    "deducted": total_deduct,
+                    "remaining": new_quantity,
+                    "old_quantity": old_quantity,
+                    "status": status,
+                    "status_changed": status_changed,
+                    "warning": _status_warning(item, status, new_quantity) if status_changed else None
+                })
+            else:
+                ingredient_name = ingredient_name.strip()
+                deducted_items.append({
+                    "ingredient": ingredient_name,
+                    "deducted": 0,
+                    "remaining": 0,
+                    "message": f"재고에 '{ingredient_name}'이(가) 등록되지 않았습니다. CSV 파일을 다시 업로드하세요."
+                })
+                print(f"경고: 재고에 '{ingredient_name}'이(가) 없습니다. 메뉴: {sale.menu_name}")
+
+        events.append({
+            "menu_id": recipe.menu_id,
+            "menu_name": sale.menu_name,
+            "quantity": sale.quantity,
+            "sold_at": _parse_timestamp(sale.timestamp),
+            "deductions": deductions
+        })
+        results.append({
+            "menu_name": sale.menu_name,
+            "quantity": sale.quantity,
+            "status": "success",
+            "deducted_items": deducted_items
+        })
+        if key:
+            responses[key] = results[-1]
+
+    if events:
+        db.execute(insert(SalesEvent), events)
+        rollup_service.apply_increments(db, events)
+
+    offset = 0
+    for batch_key, count in batch_keys:
+        if batch_key:
+            responses[idempotency_service.batch_key(batch_key)] = {"results": results[offset:offset + count]}
+        offset += count
+    idempotency_service.stage(db, responses)
+    data_version.bump(
+        db,
+        *([data_version.INVENTORY] if inventory else []),
+        *([data_version.SALES] if events else [])
+    )
+    db.commit()
+    idempotency_service.remember(responses)
+    inventory_service.publish_stock_changes([
+        inventory_service.StockChange(
+            item_id, item["name"], item["unit"], item["min_quantity"],
+            starting_quantities[item_id], item["quantity"]
+        )
+        for item_id, item in inventory.items()
+    ])
+
+    return results
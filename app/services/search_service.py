@@ -0,0 +1,238 @@
+import heapq
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import Integer, column, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.models.inventory import InventoryItem
+from app.models.menu import Menu
+from app.services import data_version
+
+
+# trigram 토크나이저는 3글자 이상이어야 색인을 탄다 (한글 부분 문자열 검색 지원)
+MIN_MATCH_LENGTH = 3
+# 그보다 짧은 검색어(딸기, 우유 등 두 글자 재료명)는 메모리 n-gram 색인으로 찾는다.
+# 일치하는 항목이 이보다 많으면 IN 목록보다 LIKE 스캔이 낫다
+SHORT_MATCH_MAX_IDS = 5000
+
+_fts_enabled = False
+
+_SEARCH_INDEXES = {
+    "inventory_search": {
+        "table": "inventory_items",
+        "columns": ("name", "category"),
+    },
+    "menu_search": {
+        "table": "menus",
+        "columns": ("name",),
+    },
+}
+
+
+def _ddl(index_name: str, table: str, columns: Tuple[str, ...]) -> List[str]:
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{col}" for col in columns)
+    old_values = ", ".join(f"old.{col}" for col in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {index_name} USING fts5({cols}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {index_name}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {index_name}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {index_name}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {index_name}({index_name}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {index_name}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {index_name}({index_name}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {index_name}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"INSERT INTO {index_name}({index_name}) VALUES ('rebuild')",
+    ]
+
+
+def ensure_search_index(engine: Engine):
+    """SQLite FTS5 검색 색인과 동기화 트리거를 만든다. FTS5 를 쓸 수 없으면 LIKE 검색으로 동작한다."""
+    global _fts_enabled
+    if engine.dialect.name != "sqlite":
+        _fts_enabled = False
+        return
+
+    try:
+        with engine.begin() as conn:
+            existing = {
+                row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))
+            }
+            for index_name, spec in _SEARCH_INDEXES.items():
+                if index_name in existing:
+                    continue
+                # 색인을 처음 만들 때만 기존 데이터로 채운다 (rebuild)
+                for statement in _ddl(index_name, spec["table"], spec["columns"]):
+                    conn.execute(text(statement))
+                print(f"검색 색인 생성: {index_name}")
+        _fts_enabled = True
+    except Exception as e:
+        print(f"FTS5 검색 색인을 만들 수 없어 LIKE 검색을 사용합니다: {e}")
+        _fts_enabled = False
+
+
+class _ShortIndex(NamedTuple):
+    version: int
+    # 1글자/2글자 조각 -> 그 조각을 포함하는 id (id 순)
+    grams: Dict[str, List[int]]
+    names: Dict[int, str]
+
+
+_short_lock = threading.Lock()
+_short_indexes: Dict[str, _ShortIndex] = {}
+
+
+def _grams(value: str) -> set:
+    value = value.casefold()
+    return set(value) | {value[i:i + 2] for i in range(len(value) - 1)}
+
+
+def _build_short_index(db: Session, kind: str, version: int) -> _ShortIndex:
+    if kind == "inventory":
+        rows = db.query(InventoryItem.id, InventoryItem.name, InventoryItem.category).order_by(InventoryItem.id)
+    else:
+        rows = db.query(Menu.id, Menu.name).order_by(Menu.id)
+    grams: Dict[str, List[int]] = {}
+    names: Dict[int, str] = {}
+    for row in rows:
+        names[row[0]] = row[1]
+        for gram in set().union(*(_grams(value or "") for value in row[1:])):
+            grams.setdefault(gram, []).append(row[0])
+    return _ShortIndex(version, grams, names)
+
+
+def _short_index(db: Session, kind: str) -> _ShortIndex:
+    # 재고 이름/분류는 CATALOG, 메뉴 이름은 MENU 버전을 따른다 (워커 간 공유)
+    version = data_version.get(db, data_version.CATALOG if kind == "inventory" else data_version.MENU)
+    with _short_lock:
+        index = _short_indexes.get(kind)
+        if index is not None and index.version == version:
+            return index
+
+    index = _build_short_index(db, kind, version)
+    with _short_lock:
+        current = _short_indexes.get(kind)
+        if current is None or current.version <= version:
+            _short_indexes[kind] = index
+    return index
+
+
+def _short_match_ids(db: Session, kind: str, query: Optional[str]) -> Optional[List[int]]:
+    """1~2글자 검색어와 부분 일치하는 id 목록. 짧은 검색어가 아니거나 일치가 너무 많으면 None"""
+    query = (query or "").strip()
+    if not 0 < len(query) < MIN_MATCH_LENGTH:
+        return None
+    ids = _short_index(db, kind).grams.get(query.casefold(), [])
+    return ids if len(ids) <= SHORT_MATCH_MAX_IDS else None
+
+
+def short_inventory_ids(db: Session, query: Optional[str]) -> Optional[List[int]]:
+    return _short_match_ids(db, "inventory", query)
+
+
+def _match_expression(query: str) -> str:
+    # 구문 검색("...")으로 감싸 trigram 부분 문자열 일치로 처리
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def uses_index(query: Optional[str]) -> bool:
+    return _fts_enabled and query is not None and len(query.strip()) >= MIN_MATCH_LENGTH
+
+
+def inventory_match_ids(query: str):
+    """get_inventory_items 등의 필터에 쓸 수 있는 일치 id 서브쿼리."""
+    return text(
+        "SELECT rowid FROM inventory_search WHERE inventory_search MATCH :match"
+    ).bindparams(match=_match_expression(query.strip())).columns(column("rowid", Integer))
+
+
+def search_inventory(db: Session, query: str, limit: int = 20) -> List[InventoryItem]:
+    query = query.strip()
+    if not query:
+        return []
+
+    if uses_index(query):
+        ids = [
+            row[0] for row in db.execute(
+                text(
+                    "SELECT rowid FROM inventory_search WHERE inventory_search MATCH :match "
+                    "ORDER BY bm25(inventory_search, 10.0, 1.0) LIMIT :limit"
+                ),
+                {"match": _match_expression(query), "limit": limit}
+            )
+        ]
+        items = {item.id: item for item in db.query(InventoryItem).filter(InventoryItem.id.in_(ids))}
+        return [items[item_id] for item_id in ids if item_id in items]
+
+    pattern = f"%{_escape_like(query)}%"
+    prefix = f"{_escape_like(query)}%"
+    short_ids = short_inventory_ids(db, query)
+    if short_ids is not None:
+        condition = InventoryItem.id.in_(short_ids)
+    else:
+        condition = InventoryItem.name.like(pattern, escape="\\") | InventoryItem.category.like(pattern, escape="\\")
+    return db.query(InventoryItem).filter(condition).order_by(
+        InventoryItem.name.like(prefix, escape="\\").desc(),
+        InventoryItem.name
+    ).limit(limit).all()
+
+
+def search_menus(db: Session, query: str, limit: int = 20) -> List[Tuple[int, str]]:
+    query = query.strip()
+    if not query:
+        return []
+
+    if uses_index(query):
+        return [
+            (row[0], row[1]) for row in db.execute(
+                text(
+                    "SELECT rowid, name FROM menu_search WHERE menu_search MATCH :match "
+                    "ORDER BY rank LIMIT :limit"
+                ),
+                {"match": _match_expression(query), "limit": limit}
+            )
+        ]
+
+    short_ids = _short_match_ids(db, "menu", query)
+    if short_ids is not None:
+        # 메뉴는 이름만 필요하므로 DB 조회 없이 색인에서 바로 정렬한다 (접두 일치 먼저, 이름 순)
+        names = _short_index(db, "menu").names
+        folded = query.casefold()
+        return heapq.nsmallest(
+            limit,
+            ((menu_id, names[menu_id]) for menu_id in short_ids),
+            key=lambda match: (not match[1].casefold().startswith(folded), match[1])
+        )
+
+    pattern = f"%{_escape_like(query)}%"
+    prefix = f"{_escape_like(query)}%"
+    return db.query(Menu.id, Menu.name).filter(
+        Menu.name.like(pattern, escape="\\")
+    ).order_by(Menu.name.like(prefix, escape="\\").desc(), Menu.name).limit(limit).all()
+
+
+def _prefix_range(name_column, prefix: str):
+    # name 인덱스를 타는 범위 조건 (prefix <= name < prefix + U+FFFF)
+    return (name_column >= prefix) & (name_column < prefix + "\uffff")
+
+
+def autocomplete_inventory(db: Session, prefix: str, limit: int = 10) -> List[Tuple[int, str]]:
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+    return db.query(InventoryItem.id, InventoryItem.name).filter(
+        _prefix_range(InventoryItem.name, prefix)
+    ).order_by(InventoryItem.name).limit(limit).all()
+
+
+def autocomplete_menus(db: Session, prefix: str, limit: int = 10) -> List[Tuple[int, str]]:
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+    return db.query(Menu.id, Menu.name).filter(
+        _prefix_range(Menu.name, prefix)
+    ).order_by(Menu.name).limit(limit).all()
@@ -0,0 +1,82 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+
+def seed(items: int, menus: int, ingredients_per_menu: int):
+    from app.database import SessionLocal
+    from app.models import InventoryItem, Menu, MenuIngredient
+
+    rng = random.Random(42)
+    categories = ["유제품", "시럽", "원두", "과일", "베이커리", "포장재"]
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(InventoryItem, [
+            {
+                "name": f"재료{n:05d}",
+                "category": categories[n % len(categories)],
+                "quantity": rng.choice([0, rng.uniform(1, 20), rng.uniform(20, 500)]),
+                "unit": "ml",
+                "min_quantity": 20,
+                "price": round(rng.uniform(100, 5000))
+            }
+            for n in range(items)
+        ])
+        db.bulk_insert_mappings(Menu, [{"id": n + 1, "name": f"메뉴{n:04d}"} for n in range(menus)])
+        db.bulk_insert_mappings(MenuIngredient, [
+            {
+                "menu_id": n + 1,
+                "ingredient_name": f"재료{rng.randrange(items):05d}",
+                "quantity": rng.uniform(5, 200),
+                "unit": "ml"
+            }
+            for n in range(menus)
+            for _ in range(ingredients_per_menu)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def measure(client, path: str, repeat: int) -> dict:
+    client.get(path)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path)
+        timings.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+    return {
+        "path": path,
+        "rows": len(response.json()),
+        "median": statistics.median(timings),
+        "min": min(timings)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="재고/메뉴 목록 API 응답 시간 측정 (임시 SQLite DB 에 더미 데이터를 채운 뒤 실행)"
+    )
+    parser.add_argument("--items", type=int, default=10000, help="생성할 재고 아이템 수")
+    parser.add_argument("--menus", type=int, default=500, help="생성할 메뉴 수")
+    parser.add_argument("--ingredients-per-menu", type=int, default=5, help="메뉴당 재료 수")
+    parser.add_argument("--repeat", type=int, default=20, help="엔드포인트별 반복 횟수")
+    args = parser.parse_args()
+
+    # app.database 가 import 시점에 엔진을 만들므로 그 전에 임시 DB 를 지정 (운영 DB 는 건드리지 않음)
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='bizup-bench-')}/bench.db"
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        seed(args.items, args.menus, args.ingredients_per_menu)
+        print(f"더미 데이터: 재고 {args.items}개, 메뉴 {args.menus}개 (메뉴당 재료 {args.ingredients_per_menu}개)")
+        print(f"{'엔드포인트':<30}{'행 수':>8}{'중앙값(ms)':>14}{'최소(ms)':>12}")
+        for path in ["/api/v1/inventory/?limit=10000", "/api/v1/inventory/low-stock", "/api/v1/menus/"]:
+            result = measure(client, path, args.repeat)
+            print(f"{result['path']:<30}{result['rows']:>8}{result['median']:>14.1f}{result['min']:>12.1f}")
@@ -0,0 +1,17 @@
+import argparse
+from app.database import SessionLocal, init_db
+from app.services import rollup_service
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="매출 롤업 테이블 재계산 (sales_events 원본 기준)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="한 번에 읽을 매출 이벤트 수")
+    args = parser.parse_args()
+    
+    init_db()
+    db = SessionLocal()
+    try:
+        result = rollup_service.rebuild(db, chunk_size=args.chunk_size)
+        print(f"롤업 재계산 완료: 이벤트 {result['events_processed']}건, 청크 {result['chunks']}개")
+    finally:
+        db.close()
@@ -4,6 +4,7 @@ import httpx
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 import time
+import uuid
 import os
 import glob
 
@@ -76,26 +77,33 @@ class SalesSimulator:
         
         return sales
     
-    async def send_sales_to_backend(self, sales: List[Dict]):
+    async def send_sales_to_backend(self, sales: List[Dict], max_attempts: int = 3):
         if not sales:
             return
         
-        try:
-            async with httpx.AsyncClient(timeout=5.0, follow_redirects=True) as client:
-                response = await client.post(
-                    f"{self.backend_url}/api/v1/sales/receive",
-                    json={"sales": sales}
-                )
-                if response.status_code == 200:
-                    print(f"매출 전송 성공: {len(sales)}건")
-                else:
-                    print(f"매출 전송 실패: HTTP {response.status_code}")
-        except httpx.ConnectError:
-            print(f"백엔드 서버에 연결할 수 없습니다: {self.backend_url}")
-        except httpx.TimeoutException:
-            print(f"백엔드 서버 응답 시간 초과")
-        except Exception as e:
-            print(f"매출 전송 오류: {e}")
+        # 재시도해도 같은 배치로 인식되도록 배치마다 멱등성 키를 하나 발급
+        idempotency_key = uuid.uuid4().hex
+        for attempt in range(1, max_attempts + 1):
+            try:
+                async with httpx.AsyncClient(timeout=5.0, follow_redirects=True) as client:
+                    response = await client.post(
+                        f"{self.backend_url}/api/v1/sales/receive",
+                        json={"sales": sales},
+                        headers={"Idempotency-Key": idempotency_key}
+                    )
+                    if response.status_code == 200:
+                        print(f"매출 전송 성공: {len(sales)}건")
+                    else:
+                        print(f"매출 전송 실패: HTTP {response.status_code}")
+                    return
+            except httpx.ConnectError:
+                print(f"백엔드 서버에 연결할 수 없습니다: {self.backend_url}")
+                return
+            except httpx.TimeoutException:
+                print(f"백엔드 서버 응답 시간 초과 (시도 {attempt}/{max_attempts})")
+            except Exception as e:
+                print(f"매출 전송 오류: {e}")
+                return
     
     async def check_backend_connection(self) -> bool:
         try:
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# app.database 가 import 시점에 엔진을 만들므로 가장 먼저 임시 SQLite DB 를 지정한다
+_tmp_dir = tempfile.mkdtemp(prefix="bizup-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/test.db"
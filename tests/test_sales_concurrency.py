@@ -0,0 +1,97 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.database import SessionLocal, init_db
+from app.models import InventoryItem, Menu, MenuIngredient, SalesEvent
+from app.services import data_version, sales_service
+
+THREADS = 16
+BATCHES_PER_THREAD = 10
+PER_SERVING = 2.0
+
+
+@pytest.fixture
+def ingredient():
+    """'우유' 재고 하나와 1인분에 우유 PER_SERVING 을 쓰는 '라떼' 메뉴"""
+    init_db()
+    db = SessionLocal()
+    db.query(SalesEvent).delete()
+    db.query(MenuIngredient).delete()
+    db.query(Menu).delete()
+    db.query(InventoryItem).delete()
+    item = InventoryItem(name="우유", category="유제품", quantity=0, unit="ml", min_quantity=0, price=0)
+    menu = Menu(name="라떼")
+    db.add_all([item, menu])
+    db.flush()
+    db.add(MenuIngredient(menu_id=menu.id, ingredient_name="우유", quantity=PER_SERVING, unit="ml"))
+    # 서비스를 거치지 않고 바꿨으므로 레시피 캐시가 새 재고 id 를 보도록 버전을 올린다
+    data_version.bump(db, data_version.INVENTORY, data_version.MENU, data_version.CATALOG)
+    db.commit()
+    item_id = item.id
+    db.close()
+
+    def set_quantity(quantity: float):
+        with SessionLocal() as session:
+            session.query(InventoryItem).filter(InventoryItem.id == item_id).update({"quantity": quantity})
+            session.commit()
+
+    def get_quantity() -> float:
+        with SessionLocal() as session:
+            return session.query(InventoryItem.quantity).filter(InventoryItem.id == item_id).scalar()
+
+    return SimpleNamespace(set_quantity=set_quantity, get_quantity=get_quantity)
+
+
+def _hammer(servings_per_batch: int):
+    """THREADS 개 스레드가 각자 세션으로 같은 재료를 차감하는 매출 배치를 동시에 반영한다."""
+    barrier = threading.Barrier(THREADS)
+    errors = []
+
+    def worker(worker_id: int):
+        db = SessionLocal()
+        try:
+            barrier.wait()
+            for batch in range(BATCHES_PER_THREAD):
+                sales = [
+                    SimpleNamespace(menu_name="라떼", quantity=1, timestamp="2025-10-09T12:00:00",
+                                    idempotency_key=None)
+                    for _ in range(servings_per_batch)
+                ]
+                results = sales_service.apply_sales(db, sales)
+                assert all(result["status"] == "success" for result in results)
+        except Exception as e:
+            errors.append((worker_id, e))
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_concurrent_deductions_are_not_lost(ingredient):
+    servings_per_batch = 3
+    total = THREADS * BATCHES_PER_THREAD * servings_per_batch * PER_SERVING
+    initial = total + 500
+    ingredient.set_quantity(initial)
+
+    _hammer(servings_per_batch)
+
+    assert ingredient.get_quantity() == pytest.approx(initial - total)
+
+
+def test_concurrent_deductions_clamp_at_zero(ingredient):
+    servings_per_batch = 3
+    ingredient.set_quantity(100)
+
+    _hammer(servings_per_batch)
+
+    assert ingredient.get_quantity() == 0
+    with SessionLocal() as db:
+        # 재고가 바닥나도 매출 이력은 모두 기록된다
+        assert db.query(SalesEvent).count() == THREADS * BATCHES_PER_THREAD * servings_per_batch